@@ -0,0 +1,191 @@
+import gzip
+import json
+from datetime import date, datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select, insert
+
+from extensions import db
+from models import User, Goal, Habit, QuestHistory, DailyLog, Notification
+from jobs import recount_monthly_xp
+
+# ---------------------------------------------------------
+# FULL-ACCOUNT ARCHIVE
+# Newline-delimited JSON (gzip on disk / over the wire):
+#   line 1: {"format": "liferpg-account", "version": 1, "user": {...}}
+#   then:   {"t": "<table>", "id": <old id>, "row": {...}}
+# Parents come before children (goal -> habit -> history) so restore can
+# remap foreign keys in one pass.
+# ---------------------------------------------------------
+ARCHIVE_FORMAT = "liferpg-account"
+ARCHIVE_VERSION = 1
+ARCHIVE_BATCH = 1000
+
+# Profile/stat columns carried over on restore (never auth or permission flags)
+PROFILE_FIELDS = [
+    'theme', 'gold', 'current_streak', 'last_active_date', 'total_focus_time', 'total_xp',
+    'str_score', 'int_score', 'wis_score', 'cha_score', 'con_score'
+]  # monthly_xp is rebuilt from the restored history instead
+
+# table tag -> (model, owner column, remapped foreign keys)
+ARCHIVE_TABLES = [
+    ('goal', Goal, Goal.user_id, {}),
+    ('habit', Habit, None, {'goal_id': 'goal'}),
+    ('history', QuestHistory, QuestHistory.user_id, {'habit_id': 'habit'}),
+    ('daily_log', DailyLog, DailyLog.user_id, {}),
+    ('notification', Notification, Notification.user_id, {}),
+]
+
+
+def _encode(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decode(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def _data_columns(model):
+    # updated_at is left to its default on restore so sync clients see the rows as new
+    return [c for c in model.__table__.columns if c.name not in ('id', 'user_id', 'updated_at')]
+
+
+def iter_account_archive(user_id):
+    """Yield the archive for one user as NDJSON lines, reading rows in batches."""
+    user = db.session.get(User, user_id)
+    header = {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "exported_at": datetime.utcnow().isoformat(),
+        "user": {"username": user.username, **{f: _encode(getattr(user, f)) for f in PROFILE_FIELDS}}
+    }
+    yield json.dumps(header) + "\n"
+
+    for tag, model, owner, _ in ARCHIVE_TABLES:
+        columns = _data_columns(model)
+        if owner is not None:
+            stmt = select(model.__table__.c.id, *columns).where(owner == user_id)
+        else:
+            stmt = select(model.__table__.c.id, *columns).join(Goal, Habit.goal_id == Goal.id).where(Goal.user_id == user_id)
+        stmt = stmt.order_by(model.__table__.c.id).execution_options(yield_per=ARCHIVE_BATCH)
+
+        for row in db.session.execute(stmt):
+            record = {c.name: _encode(v) for c, v in zip(columns, row[1:])}
+            yield json.dumps({"t": tag, "id": row[0], "row": record}) + "\n"
+
+
+def restore_account_archive(lines, user_id, include_profile=True):
+    """
+    Stream an archive into `user_id` with batched bulk inserts.
+    Returns {table: rows_inserted}. Runs as one transaction.
+    """
+    id_maps = {tag: {} for tag, *_ in ARCHIVE_TABLES}
+    specs = {tag: (model, owner, fks) for tag, model, owner, fks in ARCHIVE_TABLES}
+    parents = {parent for *_, fks in ARCHIVE_TABLES for parent in fks.values()}
+    pending = {tag: [] for tag in specs}
+    counts = {tag: 0 for tag in specs}
+
+    def flush(tag):
+        rows = pending[tag]
+        if not rows:
+            return
+        model = specs[tag][0]
+        if tag in parents:
+            # Referenced by a later table, so keep the new ids in input order
+            old_ids = [r.pop('_old_id') for r in rows]
+            new_ids = db.session.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            id_maps[tag].update(zip(old_ids, new_ids))
+        else:
+            db.session.execute(insert(model), rows)
+        counts[tag] += len(rows)
+        pending[tag] = []
+
+    try:
+        it = iter(lines)
+        header = json.loads(next(it))
+        if header.get("format") != ARCHIVE_FORMAT or header.get("version") != ARCHIVE_VERSION:
+            raise ValueError("Not a LifeRPG account archive (or unsupported version)")
+
+        user = db.session.get(User, user_id)
+        if include_profile:
+            for field in PROFILE_FIELDS:
+                if field in header["user"]:
+                    setattr(user, field, _decode(User.__table__.c[field], header["user"][field]))
+
+        current_tag = None
+        for line in it:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            tag = entry["t"]
+            if tag not in specs:
+                continue
+            if tag != current_tag and current_tag is not None:
+                flush(current_tag)
+            current_tag = tag
+
+            model, owner, fks = specs[tag]
+            columns = {c.name: c for c in _data_columns(model)}
+            row = {name: _decode(columns[name], value) for name, value in entry["row"].items() if name in columns}
+            for fk, parent in fks.items():
+                row[fk] = id_maps[parent].get(row.get(fk))
+                if row[fk] is None and not columns[fk].nullable:
+                    break  # orphan of a required parent
+            else:
+                if owner is not None:
+                    row['user_id'] = user_id
+                if tag in parents:
+                    row['_old_id'] = entry["id"]
+                pending[tag].append(row)
+                if len(pending[tag]) >= ARCHIVE_BATCH:
+                    flush(tag)
+
+        for tag in specs:
+            flush(tag)
+        recount_monthly_xp([user_id])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return counts
+
+
+# ---------------------------------------------------------
+# CLI: flask account export|restore (backups, shard moves)
+# ---------------------------------------------------------
+account_cli = AppGroup('account', help='Full-account archive export/restore.')
+
+
+@account_cli.command('export')
+@click.argument('user_id', type=int)
+@click.argument('path')
+def export_account_command(user_id, path):
+    """Write USER_ID's archive to PATH (.ndjson.gz)."""
+    with gzip.open(path, 'wt', encoding='utf-8') as fh:
+        for line in iter_account_archive(user_id):
+            fh.write(line)
+    click.echo(f"Exported user {user_id} to {path}")
+
+
+@account_cli.command('restore')
+@click.argument('path')
+@click.argument('user_id', type=int)
+@click.option('--no-profile', is_flag=True, help="Keep the target user's XP/stats untouched.")
+def restore_account_command(path, user_id, no_profile):
+    """Load the archive at PATH into existing user USER_ID."""
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        counts = restore_account_archive(fh, user_id, include_profile=not no_profile)
+    click.echo(", ".join(f"{tag}: {n}" for tag, n in counts.items()))
@@ -0,0 +1,244 @@
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped; gzip is always built
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # icons are skipped; the manifest keeps pointing at logo.png
+    Image = None
+
+# ---------------------------------------------------------
+# FINGERPRINTED STATIC ASSETS
+#   flask assets build [--prune]
+# Writes content-hashed copies of the static files to static/dist/
+# (style.3fa9c1e07b.css), minified, with .gz/.br siblings for text files, plus
+# sized PWA icons and a manifest.json pointing at them. static/dist/assets.json
+# maps source name -> hashed name; at startup url_for('static', ...) is
+# rewritten through it and /static/dist/ is served pre-compressed with a
+# one-year immutable Cache-Control. Entries whose source changed since the
+# build are ignored, so a stale build never hides an edit.
+# ---------------------------------------------------------
+DIST = 'dist'
+ASSET_MAP = 'assets.json'
+SKIP = {'sw.js', 'manifest.json'}   # the worker must keep its URL; the manifest is rebuilt
+COMPRESSIBLE = {'.css', '.js', '.json', '.svg'}
+ICON_SOURCE = 'logo.png'
+ICON_SIZES = (192, 512)
+IMMUTABLE = 365 * 24 * 3600
+
+assets_cli = AppGroup('assets', help='Build fingerprinted static assets.')
+
+
+def _digest(*chunks):
+    h = hashlib.sha256()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()[:10]
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    # Conservative: drop indentation, blank lines and whole-line comments only.
+    # Lines inside a multi-line template literal are left untouched.
+    out, in_template, in_comment = [], False, False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if in_template:
+            out.append(line)
+        elif in_comment:
+            in_comment = '*/' not in stripped
+            continue
+        elif not stripped or stripped.startswith('//'):
+            continue
+        elif stripped.startswith('/*'):
+            in_comment = '*/' not in stripped
+            continue
+        else:
+            out.append(stripped)
+        if line.count('`') % 2:
+            in_template = not in_template
+    return '\n'.join(out) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write(dist, name, data):
+    with open(os.path.join(dist, name), 'wb') as f:
+        f.write(data)
+
+
+def _emit(dist, name, data):
+    """Write data under a hashed name (plus compressed siblings) and return that name."""
+    stem, ext = os.path.splitext(name)
+    hashed = f"{stem}.{_digest(data)}{ext}"
+    _write(dist, hashed, data)
+    if ext in COMPRESSIBLE:
+        packed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(packed) < len(data):
+            _write(dist, hashed + '.gz', packed)
+        if brotli is not None:
+            packed = brotli.compress(data, quality=11)
+            if len(packed) < len(data):
+                _write(dist, hashed + '.br', packed)
+    return hashed
+
+
+def _icons(static, dist):
+    if Image is None:
+        click.echo("WARNING: Pillow not installed; skipping icons (see requirements.txt)", err=True)
+        return []
+    icons = []
+    with Image.open(os.path.join(static, ICON_SOURCE)) as logo:
+        logo = logo.convert('RGBA')
+        for size in ICON_SIZES:
+            buf = io.BytesIO()
+            logo.resize((size, size), Image.LANCZOS).save(buf, 'PNG', optimize=True)
+            hashed = _emit(dist, f"icon-{size}.png", buf.getvalue())
+            icons.append({'src': f"{current_app.static_url_path}/{DIST}/{hashed}",
+                          'sizes': f"{size}x{size}", 'type': 'image/png'})
+    return icons
+
+
+def _source_digest(static, sources):
+    chunks = []
+    for name in sources:
+        with open(os.path.join(static, name), 'rb') as f:
+            chunks.append(f.read())
+    return _digest(*chunks)
+
+
+@assets_cli.command('build')
+@click.option('--prune', is_flag=True, help='Delete dist files that are not part of this build.')
+def build_assets(prune):
+    """Hash, minify and pre-compress static/ into static/dist/."""
+    static = current_app.static_folder
+    dist = os.path.join(static, DIST)
+    os.makedirs(dist, exist_ok=True)
+    if brotli is None:
+        click.echo("WARNING: brotli not installed; skipping .br files (see requirements.txt)", err=True)
+
+    entries = {}
+    for name in sorted(os.listdir(static)):
+        path = os.path.join(static, name)
+        if name in SKIP or not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        ext = os.path.splitext(name)[1]
+        if ext in MINIFIERS:
+            data = MINIFIERS[ext](data.decode('utf-8')).encode('utf-8')
+        entries[name] = {'file': _emit(dist, name, data), 'sources': [name]}
+
+    manifest_sources = ['manifest.json']
+    with open(os.path.join(static, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    icons = _icons(static, dist)
+    if icons:
+        manifest['icons'] = icons
+        manifest_sources.append(ICON_SOURCE)
+    data = json.dumps(manifest, separators=(',', ':')).encode('utf-8')
+    entries['manifest.json'] = {'file': _emit(dist, 'manifest.json', data), 'sources': manifest_sources}
+
+    for entry in entries.values():
+        entry['source'] = _source_digest(static, entry['sources'])
+    with open(os.path.join(dist, ASSET_MAP), 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+
+    if prune:
+        keep = {ASSET_MAP}
+        for entry in entries.values():
+            keep.update({entry['file'], entry['file'] + '.gz', entry['file'] + '.br'})
+        for name in os.listdir(dist):
+            if name not in keep:
+                os.remove(os.path.join(dist, name))
+
+    for name, entry in entries.items():
+        size = os.path.getsize(os.path.join(dist, entry['file']))
+        click.echo(f"{name:<16} -> {DIST}/{entry['file']} ({size} bytes)")
+
+
+# --- SERVING ---
+def load_asset_map(static):
+    """source name -> 'dist/<hashed name>' for every entry that still matches its source."""
+    try:
+        with open(os.path.join(static, DIST, ASSET_MAP), encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    mapping = {}
+    for name, entry in entries.items():
+        try:
+            current = _source_digest(static, entry['sources'])
+        except OSError:
+            continue
+        if current == entry['source']:
+            mapping[name] = f"{DIST}/{entry['file']}"
+    return mapping
+
+
+def serve_asset(filename):
+    folder = os.path.join(current_app.static_folder, DIST)
+    mimetype = None
+    encoding = None
+    for enc, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if enc in request.accept_encodings and os.path.isfile(os.path.join(folder, filename + suffix)):
+            encoding = enc
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            filename += suffix
+            break
+    response = send_from_directory(folder, filename, mimetype=mimetype, max_age=IMMUTABLE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_assets(app):
+    if not app.config['ASSETS_FINGERPRINT']:
+        return
+    mapping = load_asset_map(app.static_folder)
+    app.extensions['asset_map'] = mapping
+    if not mapping:
+        return
+
+    @app.url_defaults
+    def _fingerprint(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in mapping:
+            values['filename'] = mapping[values['filename']]
+
+    app.add_url_rule(f"{app.static_url_path}/{DIST}/<path:filename>", endpoint='asset', view_func=serve_asset)
+
+
+def service_worker_source():
+    """static/sw.js with its /static/ paths fingerprinted and the build id in SHELL_VERSION."""
+    with open(os.path.join(current_app.static_folder, 'sw.js'), encoding='utf-8') as f:
+        source = f.read()
+    mapping = current_app.extensions.get('asset_map')
+    if not mapping:
+        return source
+    prefix = current_app.static_url_path
+    build = _digest(*(f.encode() for f in sorted(mapping.values())))
+    source = re.sub(r"'/static/([^']+)'", lambda m: f"'{prefix}/{mapping.get(m.group(1), m.group(1))}'", source)
+    return re.sub(r"(const SHELL_VERSION = '[^']*)'", rf"\1-{build}'", source)
@@ -0,0 +1,89 @@
+"""
+Response compression: CPU time per response vs bytes saved (compression.py).
+
+    python bench/compression.py [--repeat 50]
+
+Seeds a user with 200 habits and 3,000 history rows, fetches the dashboard,
+focus hub, analytics and the CSV export uncompressed, then runs each body
+through the same encoders the after_request hook uses at several levels and
+prints compressed size and CPU ms per call. The shipped defaults
+(COMPRESS_LEVEL, COMPRESS_BROTLI_QUALITY) are marked with *.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from compression import _Gzip, _Brotli, brotli  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Goal, Habit, QuestHistory  # noqa: E402
+
+PAGES = ('/dashboard', '/focus_hub', '/analytics', '/export')
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (4, 11)
+
+
+def _seed(app):
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', password='x', last_check_date=date.today())
+        db.session.add(user)
+        db.session.commit()
+        for g in range(8):
+            goal = Goal(name=f"Goal {g}", user_id=user.id)
+            db.session.add(goal)
+            db.session.flush()
+            db.session.add_all(Habit(name=f"Habit {g}-{i}", goal_id=goal.id, target_date=date.today(),
+                                     difficulty=('Easy', 'Medium', 'Hard', 'Epic')[i % 4]) for i in range(25))
+        db.session.add_all(QuestHistory(user_id=user.id, name=f"Quest {i}", xp_gained=5, stat_type='STR',
+                                        date_completed=date.today()) for i in range(3000))
+        db.session.commit()
+        return user.id
+
+
+def _cpu_ms(encoder_factory, body, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        encoder = encoder_factory()
+        out = encoder.compress(body) + encoder.finish()
+    return len(out), (time.process_time() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50, help='encodes per measurement')
+    args = parser.parse_args()
+
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tempfile.mkdtemp()}/bench.db"})
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(_seed(app))
+        session['_fresh'] = True
+
+    codecs = [(f"gzip-{level}", lambda level=level: _Gzip(level), level == app.config['COMPRESS_LEVEL'])
+              for level in GZIP_LEVELS]
+    if brotli is not None:
+        codecs += [(f"br-{q}", lambda q=q: _Brotli(q), q == app.config['COMPRESS_BROTLI_QUALITY'])
+                   for q in BROTLI_QUALITIES]
+    else:
+        print("brotli not installed; gzip only")
+
+    for page in PAGES:
+        response = client.get(page, headers={'Accept-Encoding': 'identity'})
+        assert response.status_code == 200 and 'Content-Encoding' not in response.headers, page
+        body = response.get_data()
+        served = client.get(page, headers={'Accept-Encoding': 'br, gzip'}).headers.get('Content-Encoding')
+        print(f"{page} {len(body):,} B (served as {served})")
+        for name, factory, default in codecs:
+            size, ms = _cpu_ms(factory, body, args.repeat)
+            mark = '*' if default else ' '
+            print(f"  {name + mark:<9} {size:>9,} B  {1 - size / len(body):6.1%} saved  {ms:8.2f} ms CPU")
+
+
+if __name__ == '__main__':
+    main()
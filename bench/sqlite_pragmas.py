@@ -0,0 +1,101 @@
+"""
+SQLite pragma profile under write contention (database.DEFAULT_SQLITE_PRAGMAS).
+
+    python bench/sqlite_pragmas.py [--procs 16] [--requests 100] [--no-reads]
+
+Forks --procs worker processes, each with its own app and connection pool on
+one shared database file, as gunicorn does. Each worker logs in as its own
+user and alternates habit toggles with /analytics?all=true reads (or only
+toggles with --no-reads). Runs once with the profile off and once on, and
+prints requests/s and the "database is locked" error rate.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Goal, Habit  # noqa: E402
+
+
+def _app(path, pragmas):
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}",
+        'SQLITE_PRAGMAS_ENABLED': pragmas,
+        'PROPAGATE_EXCEPTIONS': True,
+    })
+
+
+def _worker(args):
+    path, pragmas, user_id, habit_id, requests, reads = args
+    client = _app(path, pragmas).test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    ok = locked = failed = 0
+    for i in range(requests):
+        try:
+            if reads and i % 2:
+                response = client.get('/analytics?all=true')
+            else:
+                response = client.post(f"/toggle_habit/{habit_id}")
+            ok += response.status_code == 200
+            failed += response.status_code != 200
+        except OperationalError as e:
+            if 'locked' in str(e):
+                locked += 1
+            else:
+                failed += 1
+    return ok, locked, failed
+
+
+def run(procs, requests, reads, pragmas):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = _app(path, pragmas)
+    jobs = []
+    with app.app_context():
+        db.create_all()
+        for i in range(procs):
+            user = User(username=f"bench{i}", password='x')
+            db.session.add(user)
+            db.session.flush()
+            goal = Goal(name='Goal', user_id=user.id)
+            db.session.add(goal)
+            db.session.flush()
+            habit = Habit(name='Habit', goal_id=goal.id, xp_value=10, stat_type='STR')
+            db.session.add(habit)
+            db.session.flush()
+            jobs.append((path, pragmas, user.id, habit.id, requests, reads))
+        db.session.commit()
+        db.engine.dispose()  # no inherited connections in the forked workers
+
+    started = time.perf_counter()
+    with multiprocessing.get_context('fork').Pool(procs) as pool:
+        results = pool.map(_worker, jobs)
+    elapsed = time.perf_counter() - started
+
+    ok, locked, failed = (sum(r[i] for r in results) for i in range(3))
+    total = ok + locked + failed
+    print(f"pragmas {'on ' if pragmas else 'off'}: {ok / elapsed:6.0f} req/s, "
+          f"{locked} locked ({locked / total:.1%}), {failed} other failures, {total} requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--procs', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help='per process')
+    parser.add_argument('--no-reads', dest='reads', action='store_false', help='toggles only')
+    args = parser.parse_args()
+    for pragmas in (False, True):
+        run(args.procs, args.requests, args.reads, pragmas)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Cost of idle reminder streams (/reminders/stream, REMINDER_PUSH on).
+
+    python bench/sse_idle.py [--streams 500]
+
+Starts the app in a child process on werkzeug's threaded server (one thread
+per open stream, like gunicorn's gthread worker), checks that a stream
+receives an overdue-habit reminder, then parks --streams idle streams and
+prints how many got a 200 plus the server's RSS and thread count before,
+during and after. Linux only (reads /proc/<pid>/status).
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+
+
+def _config(path, max_streams):
+    return {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}",
+        'REMINDER_PUSH': True,
+        'REMINDER_SCAN_SECONDS': 2,
+        'REMINDER_HEARTBEAT_SECONDS': 5,
+        'REMINDER_MAX_STREAMS': max_streams + 10,
+    }
+
+
+def serve(path, port, max_streams):
+    from werkzeug.serving import make_server
+    from extensions import db
+    from models import User, Goal, Habit
+
+    app = create_app(_config(path, max_streams))
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', password='x')
+        db.session.add(user)
+        db.session.commit()
+        goal = Goal(name='Goal', user_id=user.id)
+        db.session.add(goal)
+        db.session.commit()
+        db.session.add(Habit(name='Taxes', goal_id=goal.id, target_date=date.today() - timedelta(days=1)))
+        db.session.commit()
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    server.socket.listen(max_streams + 64)
+    print('ready', flush=True)
+    server.serve_forever()
+
+
+def _proc_status(pid):
+    fields = dict(line.split(':', 1) for line in open(f"/proc/{pid}/status"))
+    return int(fields['VmRSS'].split()[0]), int(fields['Threads'])
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--streams', type=int, default=500)
+    parser.add_argument('--serve', nargs=2, metavar=('DB', 'PORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve[0], int(args.serve[1]), args.streams)
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, __file__, '--streams', str(args.streams), '--serve', path, str(port)],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, cwd=ROOT)
+    try:
+        assert server.stdout.readline().strip() == 'ready', 'server did not start'
+        app = create_app(_config(path, args.streams), minimal=True)
+        cookie = app.session_interface.get_signing_serializer(app).dumps({'_user_id': '1', '_fresh': True})
+        request = (f"GET /reminders/stream HTTP/1.1\r\nHost: bench\r\n"
+                   f"Cookie: session={cookie}\r\n\r\n").encode()
+
+        probe = socket.create_connection(('127.0.0.1', port))
+        probe.sendall(request)
+        probe.settimeout(10)
+        received, deadline = b'', time.time() + 10
+        while b'event: reminder' not in received and time.time() < deadline:
+            received += probe.recv(4096)
+        probe.close()
+        print('reminder delivered:', b'event: reminder' in received)
+        time.sleep(1)
+
+        rss0, threads0 = _proc_status(server.pid)
+        streams = []
+        for _ in range(args.streams):
+            s = socket.create_connection(('127.0.0.1', port))
+            s.sendall(request)
+            streams.append(s)
+        time.sleep(3)
+        ok = 0
+        for s in streams:
+            s.settimeout(5)
+            ok += s.recv(65536).startswith(b'HTTP/1.1 200')
+        rss1, threads1 = _proc_status(server.pid)
+        print(f"{args.streams} idle streams: {ok} got 200")
+        print(f"RSS {rss0} KB -> {rss1} KB (+{(rss1 - rss0) / args.streams:.1f} KB/stream), "
+              f"threads {threads0} -> {threads1}")
+
+        for s in streams:
+            s.close()
+        time.sleep(7)  # a heartbeat has to fail before a stream notices its client left
+        print(f"after disconnect: threads {_proc_status(server.pid)[1]}")
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Model-reply JSON decoding: per-response cost of utils._parse_json_payload.
+
+    python bench/utils_decode.py [--number N]
+
+Runs a corpus of realistic Gemini replies (bare, fenced and chatty arrays,
+bare and fenced blueprint objects, a question list) through three decoders
+and prints microseconds per response:
+  legacy   the pre-fast-path code: regex-strip fences, slice brackets, json.loads
+  stdlib   _parse_json_payload with orjson disabled
+  orjson   _parse_json_payload as shipped (skipped when orjson is missing)
+Every decoder must return the same value for every reply.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+
+TASKS = json.dumps([{
+    "name": f"Task {i}", "category": "Python Programming", "stat_type": "INT", "difficulty": 2,
+    "target_date": None, "description": "Open VS Code and write a function.",
+} for i in range(8)], indent=2)
+BLUEPRINT = json.dumps({
+    "goal_name": "Crack CLAT",
+    "habit": {"name": "Read editorial", "time_of_day": "Morning"},
+    "tasks": [{"title": f"M{i}", "description": "x" * 200} for i in range(6)],
+})
+CORPUS = [
+    (TASKS, "array"),
+    ("```json\n" + TASKS + "\n```", "array"),
+    ("Here you go:\n" + TASKS + "\nGood luck!", "array"),
+    (BLUEPRINT, "object"),
+    ("```\n" + BLUEPRINT + "\n```", "object"),
+    ('["How many hours a week?", "What level are you at?", "What gets in the way?"]', "array"),
+]
+
+
+def legacy(raw, expected):
+    clean = raw.strip()
+    clean = re.sub(r"^```(?:json)?\s*", "", clean, flags=re.IGNORECASE)
+    clean = re.sub(r"\s*```$", "", clean).strip()
+    open_char, close_char = ("[", "]") if expected == "array" else ("{", "}")
+    return json.loads(clean[clean.find(open_char):clean.rfind(close_char) + 1])
+
+
+def per_response_us(decode, number):
+    seconds = timeit.timeit(lambda: [decode(raw, expected) for raw, expected in CORPUS], number=number)
+    return seconds / number / len(CORPUS) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help='passes over the corpus')
+    args = parser.parse_args()
+
+    shipped_orjson = utils.orjson
+    decoders = [('legacy', legacy, None), ('stdlib', utils._parse_json_payload, None)]
+    if shipped_orjson is not None:
+        decoders.append(('orjson', utils._parse_json_payload, shipped_orjson))
+
+    for name, decode, orjson in decoders:
+        utils.orjson = orjson
+        for raw, expected in CORPUS:
+            assert decode(raw, expected) == legacy(raw, expected), (name, raw[:40])
+        print(f"{name:<8} {per_response_us(decode, args.number):6.1f} us/response")
+    utils.orjson = shipped_orjson
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# Route groups, registered on the app by create_app()
+BLUEPRINT_MODULES = ['core', 'admin', 'genie', 'penalty', 'reports', 'api']
@@ -0,0 +1,243 @@
+import os
+
+import requests
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+
+from database import replica_read
+from extensions import db
+from models import User, Goal, Habit, Feedback, Notification
+from utils import genie_question_cache_stats
+from conditional import etag_stats
+from fragments import fragment_cache_stats
+
+bp = Blueprint('admin', __name__)
+
+@bp.after_request
+def _no_store(response):
+    # Other players' data: never keep it in the browser or service worker cache
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@bp.route('/admin')
+@login_required
+@replica_read
+def admin_panel():
+    # 1. Kick out non-admins
+    if not current_user.is_admin:
+        return redirect(url_for('core.dashboard'))
+
+    # 2. Fetch ALL the data you need for the page
+    users_list = User.query.all()
+    goals = Goal.query.all()
+    trapped_players = User.query.filter_by(in_penalty_zone=True).all()
+    total_quests = Habit.query.count()
+    feedbacks = Feedback.query.order_by(Feedback.timestamp.desc()).all()
+
+    # 3. Send it ALL to the HTML page in ONE go
+    return render_template('admin.html',
+                           users=users_list,
+                           goals=goals,
+                           trapped_players=trapped_players,
+                           user_count=len(users_list),
+                           quests=total_quests,
+                           feedbacks=feedbacks,
+                           genie_cache=genie_question_cache_stats(),
+                           etag_stats=etag_stats(),
+                           fragment_cache=fragment_cache_stats())
+
+# --- SYSTEM ADMIN: EVALUATE PENALTY PROOF ---
+@bp.route('/admin/evaluate_penalty/<int:user_id>/<action>', methods=['POST'])
+@login_required
+def evaluate_penalty(user_id, action):
+    if not current_user.is_admin:
+        return redirect(url_for('core.dashboard'))
+
+    target_user = User.query.get_or_404(user_id)
+
+    if action == 'approve':
+        target_user.in_penalty_zone = False
+        target_user.penalty_task = None
+        target_user.penalty_proof_path = None
+        flash(f"Player {target_user.username}'s proof accepted. Penalty lock lifted.", 'success')
+
+    elif action == 'reject':
+        # Wipe the proof but leave them trapped
+        target_user.penalty_proof_path = None
+        flash(f"Player {target_user.username}'s proof rejected. They must resubmit.", 'warning')
+
+    db.session.commit()
+    return redirect(url_for('admin.admin_panel'))
+
+@bp.route('/admin/delete_user/<int:user_id>', methods=['POST'])
+@login_required
+def admin_delete_user(user_id):
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    if user_id == current_user.id: return redirect(url_for('admin.admin_panel'))
+
+    u = db.session.get(User, user_id)
+    if u:
+        db.session.delete(u)
+        db.session.commit()
+    return redirect(url_for('admin.admin_panel'))
+
+@bp.route('/admin/inspect/<int:user_id>')
+@login_required
+def admin_inspect(user_id):
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    target = db.session.get(User, user_id)
+    habits = Habit.query.join(Goal).filter(Goal.user_id == user_id).all()
+    return render_template('admin_inspect.html', target=target, habits=habits)
+
+@bp.route('/admin/bulk_purge', methods=['POST'])
+@login_required
+def bulk_purge():
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    target_id = request.form.get('target_user_id')
+    habit_ids = request.form.getlist('habit_ids')
+    msg = request.form.get('system_message')
+
+    for hid in habit_ids:
+        h = db.session.get(Habit, int(hid))
+        if h: db.session.delete(h)
+
+    if msg and target_id:
+        db.session.add(Notification(user_id=target_id, message=msg, type='warning'))
+
+    db.session.commit()
+    return redirect(url_for('admin.admin_inspect', user_id=target_id))
+
+@bp.route('/admin/broadcast', methods=['POST'])
+@login_required
+def admin_broadcast():
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    msg = request.form.get('broadcast_message')
+    if msg:
+        for u in User.query.filter(User.is_guest.is_not(True)).all():
+            db.session.add(Notification(user_id=u.id, message=msg, type='info'))
+        db.session.commit()
+    return redirect(url_for('admin.admin_panel'))
+
+@bp.route('/admin/toggle_pro/<int:user_id>')
+@login_required
+def toggle_pro(user_id):
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    u = db.session.get(User, user_id)
+    if u:
+        u.is_pro = not u.is_pro
+        db.session.commit()
+    return redirect(url_for('admin.admin_panel'))
+
+@bp.route('/admin/ban/<int:user_id>')
+@login_required
+def ban_user(user_id):
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    u = db.session.get(User, user_id)
+    if u and not u.is_admin:
+        u.is_banned = not u.is_banned
+        db.session.commit()
+    return redirect(url_for('admin.admin_panel'))
+
+@bp.route('/admin/delete_feedback', methods=['POST'])
+@login_required
+def delete_feedback():
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    action = request.form.get('action')
+    if action == 'delete_all':
+        db.session.query(Feedback).delete()
+    elif action == 'delete_selected':
+        ids = request.form.getlist('feedback_ids')
+        for fid in ids:
+            f = db.session.get(Feedback, int(fid))
+            if f: db.session.delete(f)
+    db.session.commit()
+    return redirect(url_for('admin.admin_panel'))
+
+@bp.route('/admin/mark_read/<int:feedback_id>')
+@login_required
+def mark_read(feedback_id):
+    if not current_user.is_admin: return redirect(url_for('core.dashboard'))
+    f = db.session.get(Feedback, feedback_id)
+    if f:
+        f.is_read = not f.is_read
+        db.session.commit()
+    return redirect(url_for('admin.admin_panel'))
+
+@bp.route('/admin/mailer', methods=['GET', 'POST'])
+@login_required
+def admin_mailer():
+    if not current_user.is_admin:
+        return redirect(url_for('core.dashboard'))
+
+    if request.method == 'POST':
+        user_ids = request.form.getlist('user_ids')
+        custom_emails_raw = request.form.get('custom_emails', '')
+        subject = request.form.get('subject')
+        body = request.form.get('body')
+
+        # Parse any custom emails typed in by the admin
+        custom_emails = [e.strip() for e in custom_emails_raw.split(',') if e.strip()]
+
+        # Require AT LEAST a selected user OR a custom email
+        if not user_ids and not custom_emails:
+            flash('Please select targets or enter a custom email address.', 'warning')
+            return redirect(url_for('admin.admin_mailer'))
+
+        if not subject or not body:
+            flash('Please provide a subject and body.', 'warning')
+            return redirect(url_for('admin.admin_mailer'))
+
+        users = User.query.filter(User.id.in_(user_ids)).all()
+
+        # 1. Build a unified list of targets
+        targets = []
+        for u in users:
+            if u.email:
+                targets.append({"email": u.email, "username": u.username})
+
+        # 2. Add the custom emails (Defaulting username to "Agent")
+        for ce in custom_emails:
+            targets.append({"email": ce, "username": "Agent"})
+
+        sent_count = 0
+
+        # --- USE BREVO HTTP API (Guaranteed Delivery) ---
+        url = "https://api.brevo.com/v3/smtp/email"
+        headers = {
+            "accept": "application/json",
+            "api-key": os.getenv('BREVO_API_KEY'),
+            "content-type": "application/json"
+        }
+
+        for t in targets:
+            try:
+                # Personalize email
+                personalized_body = body.replace('[USERNAME]', t['username'])
+                html_body = personalized_body.replace('\n', '<br>')
+
+                payload = {
+                    "sender": {"name": "Cosmo Command", "email": os.getenv('MAIL_USERNAME')},
+                    "to": [{"email": t['email']}],
+                    "subject": subject,
+                    "htmlContent": f"<html><body style='font-family: sans-serif;'><p>{html_body}</p></body></html>"
+                }
+
+                response = requests.post(url, json=payload, headers=headers)
+
+                if response.status_code in [200, 201, 202]:
+                    sent_count += 1
+                else:
+                    print(f"Brevo API Error for {t['email']}: {response.text}")
+                    flash(f"Failed to send to {t['email']}. Brevo Error: {response.text}", 'danger')
+
+            except Exception as e:
+                print(f"Failed to send to {t['email']}: {e}")
+                flash(f"System error sending to {t['email']}.", 'danger')
+
+        if sent_count > 0:
+            flash(f'Uplink successfully transmitted to {sent_count} addresses.', 'success')
+
+        return redirect(url_for('admin.admin_mailer'))
+
+    users = User.query.filter(User.email != None, User.email != '', User.is_guest.is_not(True)).all()  # guests have placeholder emails
+    return render_template('admin_mailer.html', users=users)
@@ -0,0 +1,504 @@
+import base64
+import binascii
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, request, jsonify, current_app, g, flash, redirect, url_for
+from flask_login import login_required, current_user
+from sqlalchemy import select, update, insert, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import User, Goal, Habit, QuestHistory, Notification, Tombstone, ApiToken, ApiOperation, add_progress, month_key
+from changes import on_user_change
+from conditional import user_data_version
+from utils import get_backlog_strategy
+
+bp = Blueprint('api', __name__)
+
+# ---------------------------------------------------------
+# WIDGET AUTH + RESPONSE CACHE
+# Widgets send "Authorization: Bearer <token>" (or ?token=). Tokens are
+# per device and stored as SHA-256 only. Resolved tokens and rendered
+# /api/get_protocol payloads sit in small in-process LRUs; the payload is
+# dropped as soon as any of the user's rows change (see changes.py), and an
+# unchanged widget gets a 304 after one data-version lookup. That lookup is
+# what keeps other workers, which never see this process's drop, from
+# serving a stale payload; the drop just frees the entry early. Tokens are only
+# cached for a few seconds (API_TOKEN_CACHE_SECONDS) so a revocation reaches
+# every worker, not just the one that handled it.
+# ---------------------------------------------------------
+API_CACHE_SIZE = 4096
+PROTOCOL_SOURCES = ('goals', 'habits')   # what /api/get_protocol renders, besides the user row
+TOKEN_TOUCH_INTERVAL = timedelta(hours=1)
+API_BATCH_MAX = 200
+
+_token_cache = OrderedDict()      # token hash -> (expires_at, user_id)
+_protocol_cache = OrderedDict()   # user_id -> (expires_at, version, etag, payload)
+_api_cache_lock = threading.Lock()
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _cache_get(cache, key):
+    with _api_cache_lock:
+        hit = cache.get(key)
+        if hit is None or hit[0] <= time.monotonic():
+            return None
+        cache.move_to_end(key)
+        return hit[1:]
+
+
+def _cache_put(cache, key, ttl, *value):
+    with _api_cache_lock:
+        cache[key] = (time.monotonic() + ttl, *value)
+        cache.move_to_end(key)
+        while len(cache) > API_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _cache_drop(cache, key):
+    with _api_cache_lock:
+        cache.pop(key, None)
+
+
+@on_user_change
+def _drop_protocol(user_id):
+    _cache_drop(_protocol_cache, user_id)
+
+
+def _lookup_token(token_hash):
+    hit = _cache_get(_token_cache, token_hash)
+    if hit:
+        return hit[0]
+
+    row = db.session.execute(
+        select(ApiToken.id, ApiToken.user_id, ApiToken.last_used_at).where(ApiToken.token_hash == token_hash)
+    ).first()
+    if row is None:
+        return None
+
+    now = datetime.utcnow()
+    if row.last_used_at is None or now - row.last_used_at > TOKEN_TOUCH_INTERVAL:
+        db.session.execute(update(ApiToken).where(ApiToken.id == row.id).values(last_used_at=now))
+        db.session.commit()
+    _cache_put(_token_cache, token_hash, current_app.config['API_TOKEN_CACHE_SECONDS'], row.user_id)
+    return row.user_id
+
+
+def _api_user_id():
+    """
+    Resolve the widget caller to a user id (None if unknown).
+    The old ?username= scheme still works while API_ALLOW_USERNAME_AUTH is on.
+    """
+    auth = request.headers.get('Authorization', '')
+    token = auth[7:].strip() if auth.startswith('Bearer ') else request.args.get('token')
+
+    user_id = None
+    if token:
+        user_id = _lookup_token(hash_token(token))
+    elif current_app.config['API_ALLOW_USERNAME_AUTH'] and request.args.get('username'):
+        user_id = db.session.scalar(select(User.id).where(User.username == request.args.get('username')))
+
+    if user_id is not None:
+        g.api_user_id = user_id
+    return user_id
+
+
+@bp.route('/api/tokens', methods=['POST'])
+@login_required
+def create_api_token():
+    name = (request.form.get('name') or 'Widget').strip()[:80]
+    token = secrets.token_urlsafe(32)
+    db.session.add(ApiToken(user_id=current_user.id, name=name, token_hash=hash_token(token)))
+    db.session.commit()
+    flash(f"New API token for '{name}' (copy it now, it won't be shown again): {token}", "info")
+    return redirect(url_for('core.settings'))
+
+
+@bp.route('/api/tokens/<int:token_id>/revoke', methods=['POST'])
+@login_required
+def revoke_api_token(token_id):
+    api_token = db.session.get(ApiToken, token_id)
+    if api_token and api_token.user_id == current_user.id:
+        _cache_drop(_token_cache, api_token.token_hash)
+        db.session.delete(api_token)
+        db.session.commit()
+        flash(f"Token '{api_token.name}' revoked.", "success")
+    return redirect(url_for('core.settings'))
+
+
+@bp.route('/api/strategy_brief', methods=['POST'])
+@login_required
+def strategy_brief():
+    data = request.json
+    msg = get_backlog_strategy(data.get('hours'), data.get('days'), data.get('mode'))
+    return jsonify({'message': msg})
+
+@bp.route('/api/get_protocol', methods=['GET'])
+def get_protocol():
+    """
+    The Widget calls this to get the Agent's status and top 3 missions.
+    Usage: /api/get_protocol  with  Authorization: Bearer <token from Settings>
+    Send the last ETag back as If-None-Match to get a 304 when nothing changed.
+    """
+    user_id = _api_user_id()
+    if user_id is None:
+        if request.args.get('username') and not request.args.get('token'):
+            return jsonify({"error": "Agent not found"}), 404
+        return jsonify({"error": "Invalid or missing API token"}), 401
+
+    # Mission status (TODAY/OVERDUE) depends on the date as well as the rows
+    version = f"{user_data_version(user_id, PROTOCOL_SOURCES)}|{date.today()}"
+    hit = _cache_get(_protocol_cache, user_id)
+    if hit and hit[0] == version:
+        _, etag, payload = hit
+    else:
+        payload = _build_protocol(user_id)
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        _cache_put(_protocol_cache, user_id, current_app.config['API_PROTOCOL_CACHE_SECONDS'], version, etag, payload)
+
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+def _build_protocol(user_id):
+    user = db.session.get(User, user_id)
+
+    # 1. Get Stats
+    stats = {
+        "level": int(user.total_xp / 1000) + 1, # Simple level calc
+        "xp": user.total_xp,
+        "streak": user.current_streak,
+        "gold": user.gold
+    }
+
+    # 2. Get Top 3 Priority Tasks
+    # Prioritizes: Overdue -> Today -> High Difficulty (ix_habit_protocol)
+    today = date.today()
+
+    tasks_query = Habit.query.join(Goal).filter(
+        Goal.user_id == user.id,
+        Habit.completed == False
+    ).order_by(
+        Habit.target_date.asc().nullslast(), # Oldest dates first, undated backlog last (same on every backend)
+        Habit.priority.desc(),               # Then hardest tasks (stored difficulty rank)
+        Habit.id
+    ).limit(3).all()
+
+    mission_list = []
+    for t in tasks_query:
+        # Calculate if overdue
+        status = "Active"
+        if t.target_date and t.target_date < today: status = "OVERDUE"
+        elif t.target_date == today: status = "TODAY"
+
+        mission_list.append({
+            "id": t.id,
+            "name": t.name,
+            "status": status,
+            "xp": t.xp_value,
+            "difficulty": t.difficulty
+        })
+
+    return {
+        "agent": user.username,
+        "status": "OPERATIONAL",
+        "stats": stats,
+        "missions": mission_list
+    }
+
+@bp.route('/api/complete_mission/<int:task_id>', methods=['POST'])
+# @csrf.exempt # Uncomment if you enable global CSRF later
+
+def complete_mission_api(task_id):
+    """
+    The Widget calls this when you tap the checkbox.
+    """
+    # 1. Verification (token, or legacy username)
+    user_id = _api_user_id()
+    user = db.session.get(User, user_id) if user_id is not None else None
+
+    task = db.session.get(Habit, task_id)
+
+    if not task or not user or task.goal.user_id != user.id:
+        return jsonify({"error": "Access Denied"}), 403
+
+    # 2. Complete the Task (conditional UPDATE so a double tap only pays once)
+    claimed = db.session.execute(
+        update(Habit)
+        .where(Habit.id == task.id, Habit.completed.is_not(True))
+        .values(completed=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed:
+        new_xp = add_progress(user.id, xp=task.xp_value, gold=int(task.xp_value / 10), monthly_xp=task.xp_value)
+
+        # Log History
+        history = QuestHistory(
+            user_id=user.id,
+            habit_id=task.id,
+            name=task.name,
+            difficulty=task.difficulty,
+            stat_type=task.stat_type,
+            xp_gained=task.xp_value,
+            date_completed=date.today()
+        )
+        db.session.add(history)
+        db.session.commit()
+
+        return jsonify({
+            "success": True,
+            "message": "Objective Complete",
+            "new_xp": new_xp
+        })
+
+    return jsonify({"success": False, "message": "Already completed"})
+
+@bp.route('/api/complete_missions', methods=['POST'])
+def complete_missions_api():
+    """
+    Batch version for widgets replaying offline taps:
+      {"operations": [{"op_id": "<client uuid>", "habit_id": 12, "completed_at": "2026-10-19T08:15:00"}, ...]}
+    Each op_id is applied at most once per user; a retry gets the original
+    result back with "replayed": true.
+    """
+    user_id = _api_user_id()
+    if user_id is None:
+        return jsonify({"error": "Invalid or missing API token"}), 401
+
+    ops = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(ops, list) or not ops:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(ops) > API_BATCH_MAX:
+        return jsonify({"error": f"At most {API_BATCH_MAX} operations per request"}), 413
+    try:
+        ops = [(str(op['op_id'])[:64], int(op['habit_id']), op.get('completed_at')) for op in ops]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Each operation needs op_id and habit_id"}), 400
+
+    # 1. Replays: op ids this user has already sent
+    done = {
+        row.op_id: row for row in db.session.execute(
+            select(ApiOperation.op_id, ApiOperation.habit_id, ApiOperation.status, ApiOperation.xp)
+            .where(ApiOperation.user_id == user_id, ApiOperation.op_id.in_(list({op_id for op_id, _, _ in ops})))
+        )
+    }
+
+    # 2. Ownership for every habit in the batch, one query
+    new_ops = [op for op in ops if op[0] not in done]
+    owned = {
+        row.id: row for row in db.session.execute(
+            select(Habit.id, Habit.name, Habit.difficulty, Habit.stat_type, Habit.xp_value)
+            .join(Goal, Habit.goal_id == Goal.id)
+            .where(Goal.user_id == user_id, Habit.id.in_(list({habit_id for _, habit_id, _ in new_ops})))
+        )
+    } if new_ops else {}
+
+    # 3. Claim all still-open habits in one conditional UPDATE
+    claimed = set()
+    if owned:
+        claimed = set(db.session.execute(
+            update(Habit)
+            .where(Habit.id.in_(list(owned)), Habit.completed.is_not(True))
+            .values(completed=True)
+            .returning(Habit.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+
+    # 4. Per-op outcome; the first op for a habit gets the completion
+    today = date.today()
+    results, op_rows, history_rows = [], [], []
+    xp_total = gold_total = month_xp = 0
+    seen_ops = set()
+    for op_id, habit_id, completed_at in ops:
+        if op_id in done:
+            prev = done[op_id]
+            results.append({"op_id": op_id, "habit_id": prev.habit_id, "status": prev.status, "xp": prev.xp, "replayed": True})
+            continue
+        if op_id in seen_ops:
+            results.append({"op_id": op_id, "habit_id": habit_id, "status": "duplicate_op", "xp": 0})
+            continue
+        seen_ops.add(op_id)
+
+        habit = owned.get(habit_id)
+        xp = 0
+        if habit is None:
+            status = "not_found"
+        elif habit_id in claimed:
+            claimed.discard(habit_id)
+            status, xp = "completed", habit.xp_value or 0
+            day = _completion_day(completed_at, today)
+            xp_total += xp
+            gold_total += int(xp / 10)
+            if month_key(day) == month_key(today):
+                month_xp += xp
+            history_rows.append({
+                "user_id": user_id, "habit_id": habit_id, "name": habit.name,
+                "difficulty": habit.difficulty, "stat_type": habit.stat_type,
+                "xp_gained": xp, "date_completed": day,
+            })
+        else:
+            status = "already_completed"
+
+        results.append({"op_id": op_id, "habit_id": habit_id, "status": status, "xp": xp})
+        op_rows.append({"user_id": user_id, "op_id": op_id, "habit_id": habit_id, "status": status, "xp": xp})
+
+    # 5. One aggregate XP/gold UPDATE, bulk history + operation log, one commit
+    new_xp = add_progress(user_id, xp=xp_total, gold=gold_total, monthly_xp=month_xp)
+    if history_rows:
+        db.session.execute(insert(QuestHistory), history_rows)
+    try:
+        if op_rows:
+            db.session.execute(insert(ApiOperation), op_rows)
+        db.session.commit()
+    except IntegrityError:
+        # The same op ids are being applied by a concurrent retry; nothing was written here
+        db.session.rollback()
+        return jsonify({"error": "Operations already in progress, retry"}), 409
+
+    return jsonify({"success": True, "xp_awarded": xp_total, "new_xp": new_xp, "results": results})
+
+
+def _completion_day(completed_at, today):
+    """Client tap time -> history date (never in the future)."""
+    try:
+        day = datetime.fromisoformat(str(completed_at).replace('Z', '+00:00')).date()
+    except ValueError:
+        return today
+    return min(day, today)
+
+
+# ---------------------------------------------------------
+# DELTA SYNC (offline-first PWA / mobile)
+# GET /api/sync?since=<cursor>  (session cookie or widget token)
+# Returns rows changed after the cursor, deleted ids from tombstones and a
+# new cursor. Clients apply "reset", then "deleted", then upsert the rows by
+# id. No/expired cursor -> "full": true, i.e. replace the local copy; when
+# "has_more" is set, keep calling with the returned cursor until it clears.
+# The cursor is opaque: one (updated_at, id) position per table, so pages
+# never stall on rows sharing a timestamp (e.g. migrated rows). Once a
+# table is caught up its position trails the clock by SYNC_SAFETY_SECONDS
+# so rows from transactions still in flight are picked up next time (sent
+# twice is fine). A plain ISO timestamp is accepted as a starting cursor.
+# ---------------------------------------------------------
+SYNC_SOURCES = [
+    ('goals', Goal, 'goal'),
+    ('habits', Habit, 'habit'),
+    ('history', QuestHistory, 'history'),
+    ('notifications', Notification, 'notification'),
+]
+
+
+def _sync_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _encode_cursor(positions, continued):
+    raw = json.dumps({
+        'p': {tag: [ts.isoformat(), row_id] for tag, (ts, row_id) in positions.items()},
+        'c': continued,
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(value):
+    """-> ({tag: (updated_at, id)}, continued). Raises ValueError on garbage."""
+    try:
+        ts = datetime.fromisoformat(value)
+        return {tag: (ts, 0) for _, _, tag in SYNC_SOURCES}, False
+    except ValueError:
+        pass
+    try:
+        data = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+        positions = {tag: (datetime.fromisoformat(ts), int(row_id)) for tag, (ts, row_id) in data['p'].items()}
+    except (binascii.Error, TypeError, KeyError, ValueError, AttributeError) as e:
+        raise ValueError(value) from e
+    if set(positions) != {tag for _, _, tag in SYNC_SOURCES}:
+        raise ValueError(value)
+    return positions, bool(data.get('c'))
+
+
+def _sync_rows(model, user_id, position, limit):
+    columns = [c for c in model.__table__.columns if c.name != 'user_id']
+    stmt = select(*columns)
+    if model is Habit:
+        stmt = stmt.join(Goal, Habit.goal_id == Goal.id).where(Goal.user_id == user_id)
+    else:
+        stmt = stmt.where(model.user_id == user_id)
+    if position is not None:
+        stmt = stmt.where(tuple_(model.updated_at, model.id) > tuple_(*position))
+    stmt = stmt.order_by(model.updated_at, model.id).limit(limit + 1)
+    return [row._mapping for row in db.session.execute(stmt)]
+
+
+@bp.route('/api/sync', methods=['GET'])
+def sync_api():
+    user_id = current_user.id if current_user.is_authenticated else _api_user_id()
+    if user_id is None:
+        return jsonify({"error": "Invalid or missing API token"}), 401
+
+    cfg = current_app.config
+    now = datetime.utcnow()
+    positions, continued = None, False
+    if request.args.get('since'):
+        try:
+            positions, continued = _decode_cursor(request.args['since'])
+        except ValueError:
+            return jsonify({"error": "Bad cursor"}), 400
+    # Only a resting cursor can be too old for the tombstones; pages handed
+    # out mid-sync (continued) must keep going from where they left off.
+    full = positions is None or (
+        not continued and min(ts for ts, _ in positions.values()) < now - timedelta(days=cfg['SYNC_TOMBSTONE_DAYS'])
+    )
+    if positions is not None and full:
+        positions = None
+
+    page = cfg['SYNC_PAGE_SIZE']
+    safe = (now - timedelta(seconds=cfg['SYNC_SAFETY_SECONDS']), 0)
+    has_more = False
+    payload = {}
+    next_positions = {}
+    for key, model, tag in SYNC_SOURCES:
+        rows = _sync_rows(model, user_id, positions and positions[tag], page)
+        if len(rows) > page:
+            rows = rows[:page]
+            has_more = True
+            next_positions[tag] = (rows[-1]['updated_at'], rows[-1]['id'])  # resume after the last row sent
+        else:
+            # Caught up: trail the clock, but never step back behind rows already paged through
+            next_positions[tag] = max(safe, positions[tag]) if positions else safe
+        payload[key] = [{k: _sync_value(v) for k, v in row.items()} for row in rows]
+
+    deleted = {tag: [] for _, _, tag in SYNC_SOURCES}
+    reset = set()
+    if positions is not None:
+        since = min(ts for ts, _ in positions.values())
+        for table, row_id in db.session.execute(
+            select(Tombstone.table, Tombstone.row_id)
+            .where(Tombstone.user_id == user_id, Tombstone.deleted_at >= since)
+        ):
+            if row_id is None:
+                reset.add(table)
+            elif table in deleted:
+                deleted[table].append(row_id)
+
+    return jsonify({
+        "cursor": _encode_cursor(next_positions, has_more),
+        "full": full,
+        "has_more": has_more,
+        "reset": sorted(reset),
+        "deleted": deleted,
+        **payload
+    })
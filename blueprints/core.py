@@ -0,0 +1,869 @@
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, date, timedelta
+
+import requests
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, Response, abort, make_response
+from flask_login import login_user, logout_user, login_required, current_user
+from flask_wtf import FlaskForm
+from wtforms import StringField, PasswordField, SubmitField, BooleanField
+from wtforms.validators import DataRequired, Length
+from itsdangerous import URLSafeTimedSerializer
+from sqlalchemy import func, insert, update
+
+from extensions import db, bcrypt, login_manager
+from database import month_window, replica_read
+from conditional import etag_cached
+from fragments import fragment_version
+from models import User, Goal, Habit, QuestHistory, Notification, Feedback, ApiToken, add_progress, month_key
+from utils import guess_category, smart_ai_parse
+from principal import load_principal
+from reminders import hub, sse_stream
+from changes import record_table_reset
+from assets import service_worker_source
+from blueprints.genie import expire_stale_forges
+
+bp = Blueprint('core', __name__)
+
+# ========================================================
+# PRESETS
+# ========================================================
+PRESETS = [
+    {"id": 1, "name": "50 Pushups", "category": "Physical", "attribute": "STR", "difficulty": "Medium", "is_daily": True},
+    {"id": 2, "name": "Morning Run (3km)", "category": "Physical", "attribute": "STR", "difficulty": "Hard", "is_daily": True},
+    {"id": 11, "name": "Read 10 Pages", "category": "Intellect", "attribute": "INT", "difficulty": "Easy", "is_daily": True},
+    {"id": 12, "name": "Code for 1 Hour", "category": "Career", "attribute": "INT", "difficulty": "Hard", "is_daily": True},
+    {"id": 21, "name": "Meditation (10m)", "category": "Mental Health", "attribute": "WIS", "difficulty": "Easy", "is_daily": True},
+    {"id": 31, "name": "Drink 3L Water", "category": "Health", "attribute": "CON", "difficulty": "Medium", "is_daily": True},
+    {"id": 41, "name": "Call Family", "category": "Social", "attribute": "CHA", "difficulty": "Medium", "is_daily": False},
+]
+
+# ========================================================
+# HELPER FUNCTIONS
+# ========================================================
+def _reset_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+
+@login_manager.user_loader
+def load_user(user_id):
+    # Slim cached projection; the full row loads only if a route needs it
+    return load_principal(int(user_id))
+
+# --- FORM CLASSES ---
+class RegisterForm(FlaskForm):
+    username = StringField('Username', validators=[DataRequired(), Length(min=2, max=20)])
+    password = PasswordField('Password', validators=[DataRequired()])
+    submit = SubmitField('Sign Up')
+
+class LoginForm(FlaskForm):
+    username = StringField('Username', validators=[DataRequired()])
+    password = PasswordField('Password', validators=[DataRequired()])
+    remember = BooleanField('Remember Me')
+    submit = SubmitField('Login')
+
+@bp.route('/')
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    today = date.today()
+
+    # 1. DAILY RESET & PENALTY SYSTEM CHECK
+    if current_user.last_check_date != today:
+        user_goals = Goal.query.filter_by(user_id=current_user.id).all()
+
+        # Calculate total penalty points for a notification
+        total_penalty_taken = 0
+
+        for goal in user_goals:
+            for habit in goal.habits:
+                # Handle Daily Repeating Tasks Reset
+                if habit.is_daily and habit.completed:
+                    habit.completed = False
+
+                # --- THE SOLO LEVELING PENALTY LOGIC ---
+# --- THE SOLO LEVELING PENALTY LOGIC ---
+                if habit.target_date and habit.target_date < today and not habit.completed:
+                    if current_user.theme == 'solo':
+                        penalty_points = habit.xp_value
+                        current_user.total_xp -= penalty_points
+                        if current_user.total_xp < 0:
+                            current_user.total_xp = 0
+
+                        total_penalty_taken += penalty_points
+                        habit.target_date = today
+
+                        # ---> NEW: TRAP THEM IN THE PENALTY ZONE <---
+                        current_user.in_penalty_zone = True
+                        if not current_user.penalty_task:
+                            penalty_tasks_list = [
+                                "Complete 100 Push-ups",
+                                "Run 5 Kilometers",
+                                "Survive: Hold a Plank for 3 Minutes",
+                                "Complete 100 Squats"
+                            ]
+                            current_user.penalty_task = random.choice(penalty_tasks_list)
+
+        # If they lost points, spawn an unavoidable System Notification!
+        if total_penalty_taken > 0 and current_user.theme == 'solo':
+            penalty_alert = Notification(
+                user_id=current_user.id,
+                message=f"[PENALTY APPLIED] You failed to complete your assigned Quests. The System has deducted {total_penalty_taken} XP from your status.",
+                type='warning',
+                is_read=False
+            )
+            db.session.add(penalty_alert)
+
+        current_user.last_check_date = today
+        db.session.commit()
+
+    # Drop Genie placeholders whose forge thread died, before listing goals
+    expire_stale_forges(current_user.id)
+
+    # ---> THIS WAS THE MISSING LINE! <---
+    goals = Goal.query.filter_by(user_id=current_user.id).all()
+
+    # 2. GET COMPLETED TASKS
+    todays_completed = [
+        q.name for q in QuestHistory.query.filter_by(user_id=current_user.id, date_completed=today).all()
+    ]
+
+    # 3. STATS
+    monthly_xp = current_user.current_monthly_xp
+    overdue_count = Habit.query.join(Goal).filter(
+        Goal.user_id == current_user.id,
+        Habit.target_date < today,
+        Habit.completed == False
+    ).count()
+
+    show_report = False
+    prev_month_date = today.replace(day=1) - timedelta(days=1)
+    if today.day <= 7:
+        has_data = QuestHistory.query.filter(
+            QuestHistory.user_id == current_user.id,
+            month_window(QuestHistory.date_completed, prev_month_date.year, prev_month_date.month)
+        ).first()
+        if has_data: show_report = True
+
+    # 4. SCAN CURRENT MONTHLY STATS FOR JOB CLASS
+    monthly_stats_raw = db.session.query(
+        QuestHistory.stat_type,
+        func.sum(QuestHistory.xp_gained)
+    ).filter(
+        QuestHistory.user_id == current_user.id,
+        month_window(QuestHistory.date_completed, today.year, today.month)
+    ).group_by(QuestHistory.stat_type).all()
+
+    monthly_stats = {'STR': 0, 'INT': 0, 'WIS': 0, 'CON': 0, 'CHA': 0}
+    for stat_type, xp in monthly_stats_raw:
+        if stat_type in monthly_stats and xp is not None:
+            monthly_stats[stat_type] = int(xp)
+
+    return render_template('dashboard.html',
+                           user=current_user,
+                           goals=goals,
+                           overdue_count=overdue_count,
+                           monthly_xp=monthly_xp,
+                           show_report=show_report,
+                           prev_month=prev_month_date,
+                           monthly_stats=monthly_stats,
+                           todays_completed=todays_completed,
+                           fragment_version=fragment_version(current_user.id, 'goals', 'habits', 'history'))
+
+# --- GUEST RATE LIMIT ---
+# Sliding window of recent guest sign-ups per client IP (per process). Only
+# enforced when TRUSTED_PROXIES says how to find the client IP; behind an
+# unconfigured proxy remote_addr is the proxy, and one bucket would throttle
+# every visitor at once.
+_guest_signups = OrderedDict()   # ip -> [timestamps]
+_guest_signup_lock = threading.Lock()
+_guest_limit_warned = False
+GUEST_SIGNUP_IPS = 10000
+
+def _allow_guest_signup(ip):
+    global _guest_limit_warned
+    if not current_app.config['TRUSTED_PROXIES']:
+        if not _guest_limit_warned:
+            _guest_limit_warned = True
+            print("[Guests] TRUSTED_PROXIES is 0: guest sign-up rate limit disabled (client IPs unknown)")
+        return True
+    now = time.monotonic()
+    window = current_app.config['GUEST_RATE_WINDOW']
+    with _guest_signup_lock:
+        recent = [t for t in _guest_signups.pop(ip, []) if now - t < window]
+        allowed = len(recent) < current_app.config['GUEST_RATE_LIMIT']
+        if allowed:
+            recent.append(now)
+        _guest_signups[ip] = recent
+        while len(_guest_signups) > GUEST_SIGNUP_IPS:
+            _guest_signups.popitem(last=False)
+        return allowed
+
+@bp.route('/guest_login')
+def guest_login():
+    if not _allow_guest_signup(request.remote_addr):
+        flash("Too many guest sessions from your network. Try again later, or register an account.", "warning")
+        return redirect(url_for('core.login'))
+
+    # Generate a random temporary username
+    guest_name = f"Guest_{uuid.uuid4().hex[:8]}"
+
+    # Create the guest user
+    guest_user = User(
+        username=guest_name,
+        email=f"{guest_name}@temp.com",
+        password="none",
+        is_guest=True
+    )
+    db.session.add(guest_user)
+    db.session.commit()
+
+    # Log them in instantly
+    login_user(guest_user)
+    flash("Welcome, Guest! Register to save your progress.", "info")
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/planning')
+@login_required
+@replica_read
+def planning():
+    goals = Goal.query.filter_by(user_id=current_user.id).all()
+    scheduled = []
+    for g in goals:
+        for h in g.habits:
+            if h.target_date and not h.completed:
+                scheduled.append(h)
+    scheduled.sort(key=lambda x: x.target_date)
+
+    date_strings = [h.target_date.strftime('%Y-%m-%d') for h in scheduled]
+    counts = Counter(date_strings) # <--- This works now because we imported Counter
+    sorted_dates = sorted(counts.keys())
+    chart_data = [counts[d] for d in sorted_dates]
+
+    return render_template('planning.html',
+                           user=current_user,
+                           goals=goals,
+                           scheduled=scheduled,
+                           chart_labels=sorted_dates,
+                           chart_data=chart_data)
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    # 1. Create the form so the HTML page doesn't crash
+    form = RegisterForm()
+
+    # If a normal user is logged in, send them away. If it's a guest, let them stay.
+    if current_user.is_authenticated and not current_user.is_guest:
+        return redirect(url_for('core.dashboard'))
+
+    # 2. Use WTForms validation
+    if form.validate_on_submit():
+        username = form.username.data
+        password = form.password.data
+
+        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+
+        # CHECK IF THEY ARE A GUEST UPGRADING
+        if current_user.is_authenticated and current_user.is_guest:
+            current_user.username = username
+            current_user.password = hashed_password
+            current_user.email = None  # Clear the temporary guest email
+            current_user.is_guest = False
+            db.session.commit()
+            flash("Account linked! WARNING: No recovery email set. Add one in Settings to prevent data loss.", "warning")
+            return redirect(url_for('core.dashboard'))
+
+        # ELSE: Normal registration for totally new people
+        else:
+            # We pass email=None explicitly
+            new_user = User(username=username, password=hashed_password, email=None)
+            db.session.add(new_user)
+            db.session.commit()
+            flash("Registration successful! WARNING: No recovery email set. Add one in Settings to prevent data loss.", "warning")
+            return redirect(url_for('core.login'))
+
+    # 3. Pass the form to the template
+    return render_template('register.html', form=form)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('core.dashboard'))
+
+    if request.method == 'POST':
+        user = User.query.filter_by(username=request.form.get('username')).first()
+        # FIXED: Using bcrypt.check_password_hash
+        if user and bcrypt.check_password_hash(user.password, request.form.get('password')):
+            login_user(user, remember=True if request.form.get('remember') else False)
+            return redirect(url_for('core.dashboard'))
+        else:
+            flash('Login Unsuccessful. Check username and password.', 'danger')
+
+    return render_template('login.html')
+
+@bp.route('/logout')
+def logout():
+    logout_user()
+    return redirect(url_for('core.login'))
+
+@bp.route('/add_habit', methods=['POST'])
+@login_required
+def add_habit():
+    goal_id = request.form.get('goal_id')
+    name = request.form.get('name')
+    stat_type = request.form.get('stat_type')
+    difficulty = request.form.get('difficulty')
+    date_str = request.form.get('target_date')
+    description = request.form.get('description')
+
+    xp_map = {'Easy': 10, 'Medium': 30, 'Hard': 50, 'Epic': 100}
+    xp = xp_map.get(difficulty, 10)
+
+    target_date_obj = None
+    if date_str:
+        try:
+            target_date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except:
+            target_date_obj = None
+
+    if name and goal_id:
+        new_habit = Habit(
+            goal_id=int(goal_id),
+            name=name,
+            stat_type=stat_type,
+            difficulty=difficulty,
+            xp_value=xp,
+            completed=False,
+            is_daily=False,
+            target_date=target_date_obj,
+            description=description if description else ""
+        )
+        db.session.add(new_habit)
+        db.session.commit()
+
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/toggle_habit/<int:habit_id>', methods=['POST'])
+@login_required
+def toggle_habit(habit_id):
+    habit = Habit.query.get(habit_id)
+    if habit and habit.goal.user_id == current_user.id:
+        was_completed = habit.completed
+        today = date.today()
+
+        # Flip only if nobody else flipped it first (double-click / second tab)
+        flipped = db.session.execute(
+            update(Habit)
+            .where(Habit.id == habit.id, Habit.completed == was_completed)
+            .values(completed=not was_completed)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.expire(habit, ['completed'])
+
+        if flipped:
+            if not was_completed:
+                history_entry = QuestHistory(
+                    user_id=current_user.id,
+                    habit_id=habit.id,
+                    name=habit.name,
+                    difficulty=habit.difficulty,
+                    stat_type=habit.stat_type,
+                    xp_gained=habit.xp_value,
+                    date_completed=today
+                )
+                db.session.add(history_entry)
+                add_progress(current_user.id, xp=habit.xp_value, stat_type=habit.stat_type,
+                             monthly_xp=habit.xp_value)
+            else:
+                # Exact row written when this habit was completed (indexed on habit_id)
+                log_to_delete = QuestHistory.query.filter_by(
+                    user_id=current_user.id,
+                    habit_id=habit.id
+                ).order_by(QuestHistory.id.desc()).first()
+                if not log_to_delete:
+                    # Rows from before habit_id existed (and not backfilled): old name match
+                    log_to_delete = QuestHistory.query.filter_by(
+                        user_id=current_user.id,
+                        habit_id=None,
+                        name=habit.name,
+                        date_completed=today
+                    ).order_by(QuestHistory.id.desc()).first()
+                undone_xp = 0
+                if log_to_delete:
+                    if month_key(log_to_delete.date_completed) == month_key(today):
+                        undone_xp = log_to_delete.xp_gained or 0
+                    db.session.delete(log_to_delete)
+                add_progress(current_user.id, xp=-habit.xp_value, stat_type=habit.stat_type,
+                             monthly_xp=-undone_xp)
+
+        db.session.commit()
+        new_monthly_xp = current_user.current_monthly_xp
+
+        return jsonify({
+            'success': True,
+            'new_total_xp': current_user.total_xp,
+            'new_monthly_xp': new_monthly_xp
+        })
+
+    return jsonify({'success': False}), 400
+
+@bp.route('/add_goal', methods=['POST'])
+@login_required
+def add_goal():
+    name = request.form.get('name')
+    # ADD THIS GUEST CHECK:
+    if current_user.is_guest:
+        current_goals = Goal.query.filter_by(user_id=current_user.id).count()
+        if current_goals >= 2:
+            flash("Guests can only create 2 categories. Please Register to unlock unlimited slots!", "warning")
+            return redirect(url_for('core.planning'))
+    if name:
+        db.session.add(Goal(name=name, user_id=current_user.id))
+        db.session.commit()
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/delete_goal/<int:goal_id>')
+@login_required
+def delete_goal(goal_id):
+    g = db.session.get(Goal, goal_id)
+    if g and g.user_id == current_user.id:
+        db.session.delete(g)
+        db.session.commit()
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/delete_habit/<int:habit_id>')
+@login_required
+def delete_habit(habit_id):
+    h = db.session.get(Habit, habit_id)
+    if h and (h.goal.user_id == current_user.id or current_user.is_admin):
+        target_id = h.goal.user_id
+        db.session.delete(h)
+        db.session.commit()
+        if current_user.is_admin and target_id != current_user.id:
+            return redirect(url_for('admin.admin_inspect', user_id=target_id))
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/edit_habit', methods=['POST'])
+@login_required
+def edit_habit():
+    h = db.session.get(Habit, request.form.get('habit_id'))
+    if h and h.goal.user_id == current_user.id:
+        h.name = request.form.get('name')
+        h.difficulty = request.form.get('difficulty')
+        h.description = request.form.get('description')
+        h.is_daily = True if request.form.get('is_daily') else False
+
+        date_str = request.form.get('target_date')
+        if date_str:
+            h.target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        else:
+            h.target_date = None
+
+        # Handle Category Move
+        new_cat = request.form.get('category_name')
+        if new_cat and new_cat != h.goal.name:
+            goal = Goal.query.filter_by(user_id=current_user.id, name=new_cat).first()
+            if not goal:
+                goal = Goal(name=new_cat, user_id=current_user.id)
+                db.session.add(goal)
+                db.session.flush()
+            h.goal_id = goal.id
+
+        db.session.commit()
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/settings', methods=['GET', 'POST'])
+@login_required
+def settings():
+    if request.method == 'POST':
+        new_email = request.form.get('email')
+        if new_email:
+            existing = User.query.filter_by(email=new_email).first()
+            if existing and existing.id != current_user.id:
+                flash('Email already in use.', 'danger')
+                return redirect(url_for('core.settings'))
+            current_user.email = new_email
+
+        if request.form.get('theme_toggle') == 'on':
+            current_user.theme = 'solo'
+        else:
+            current_user.theme = 'default'
+
+        db.session.commit()
+        flash('System settings updated.', 'success')
+        return redirect(url_for('core.settings'))
+    api_tokens = ApiToken.query.filter_by(user_id=current_user.id).order_by(ApiToken.created_at).all()
+    response = make_response(render_template('settings.html', user=current_user, presets=PRESETS, api_tokens=api_tokens))
+    # A freshly created API token is flashed here; keep it out of every cache
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@bp.route('/update_profile', methods=['POST'])
+@login_required
+def update_profile():
+    if request.form.get('username'):
+        current_user.username = request.form.get('username')
+    if request.form.get('password'):
+        # FIXED: Use bcrypt
+        current_user.password = bcrypt.generate_password_hash(request.form.get('password')).decode('utf-8')
+    db.session.commit()
+    return redirect(url_for('core.settings'))
+
+@bp.route('/delete_account', methods=['POST'])
+@login_required
+def delete_account():
+    db.session.delete(current_user.record)
+    db.session.commit()
+    logout_user()
+    return redirect(url_for('core.login'))
+
+@bp.route('/reset_progress')
+@login_required
+def reset_progress():
+    current_user.total_xp = 0
+    current_user.str_score = 0
+    current_user.int_score = 0
+    current_user.wis_score = 0
+    current_user.cha_score = 0
+    current_user.con_score = 0
+    current_user.monthly_xp = 0
+    current_user.monthly_xp_month = None
+
+    habits = Habit.query.join(Goal).filter(Goal.user_id == current_user.id).all()
+    for h in habits: h.completed = False
+
+    QuestHistory.query.filter_by(user_id=current_user.id).delete()
+    record_table_reset(current_user.id, 'history')
+    db.session.commit()
+    return redirect(url_for('core.settings'))
+
+@bp.route('/restore_preset/<int:preset_id>')
+@login_required
+def restore_preset(preset_id):
+    p = next((x for x in PRESETS if x['id'] == preset_id), None)
+    if p:
+        g = Goal.query.filter_by(user_id=current_user.id, name=p['category']).first()
+        if not g:
+            g = Goal(name=p['category'], user_id=current_user.id)
+            db.session.add(g)
+            db.session.commit()
+
+        h = Habit(name=p['name'], goal_id=g.id, difficulty=p['difficulty'],
+                  is_daily=p['is_daily'], xp_value=10, stat_type=p['attribute'])
+        db.session.add(h)
+        db.session.commit()
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/mission_print')
+@login_required
+@etag_cached('goals', 'habits')
+def mission_print():
+    habits = Habit.query.join(Goal).filter(Goal.user_id == current_user.id).all()
+    today = date.today()
+    start_week = today - timedelta(days=today.weekday())
+    week_labels = [(start_week + timedelta(days=i)).strftime('%a %d') for i in range(7)]
+    return render_template('print.html', habits=habits, week_labels=week_labels, user=current_user)
+
+@bp.route('/submit_feedback', methods=['POST'])
+@login_required
+def submit_feedback():
+    msg = request.form.get('message')
+    if msg:
+        db.session.add(Feedback(user_id=current_user.id, message=msg))
+        db.session.commit()
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/dismiss_notification/<int:notif_id>')
+@login_required
+def dismiss_notification(notif_id):
+    n = db.session.get(Notification, notif_id)
+    if n and n.user_id == current_user.id:
+        n.is_read = True
+        db.session.commit()
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/sw.js')
+def service_worker():
+    # Served from the root so its scope covers every page, not just /static/
+    response = Response(service_worker_source(), mimetype='text/javascript')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+@bp.route('/get_reminders')
+def get_reminders():
+    # Plain poll, or with REMINDER_PUSH the long-poll fallback for browsers
+    # without EventSource: ?wait=<seconds>
+    if not current_user.is_authenticated:
+        return {"alert": False}
+    wait = min(request.args.get('wait', 0, type=float), 30)
+    if not current_app.config['REMINDER_PUSH'] or wait <= 0:
+        return hub.check(current_user.id) or {"alert": False}
+
+    user_id = current_user.id
+    hub.start(current_app._get_current_object())
+    q = hub.subscribe(user_id)
+    db.session.close()  # don't hold a pooled connection while parked
+    try:
+        return q.get(timeout=wait)
+    except queue.Empty:
+        return {"alert": False}
+    finally:
+        hub.unsubscribe(user_id, q)
+
+@bp.route('/reminders/stream')
+@login_required
+def reminder_stream():
+    cfg = current_app.config
+    if not cfg['REMINDER_PUSH']:
+        abort(404)
+    if hub.stats()['streams'] >= cfg['REMINDER_MAX_STREAMS']:
+        return Response(status=503, headers={'Retry-After': '60'})
+
+    user_id = current_user.id
+    hub.start(current_app._get_current_object())
+    q = hub.subscribe(user_id)
+    db.session.close()
+
+    # Not wrapped in stream_with_context: the open stream needs nothing from the request
+    body = sse_stream(user_id, q, cfg['REMINDER_HEARTBEAT_SECONDS'], cfg['REMINDER_RETRY_MS'])
+    return Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+@bp.route('/focus_hub')
+@login_required
+def focus_hub():
+    return render_template('focus.html', user=current_user, target=240, progress=0)
+
+@bp.route('/save_focus_session', methods=['POST'])
+@login_required
+def save_focus_session():
+    data = request.json
+    minutes = data.get('minutes', 25)
+    add_progress(current_user.id, xp=minutes * 2, gold=int(minutes / 10), focus_time=minutes)
+    db.session.commit()
+    return jsonify({'success': True})
+
+@bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_tasks():
+    if request.method == 'POST':
+        text = request.form.get('raw_text')
+        if not text: return redirect(url_for('core.import_tasks'))
+
+        # 1. GET TASKS FROM AI
+        if current_user.is_pro:
+            key = os.getenv('GEMINI_API_KEY')
+            tasks = smart_ai_parse(text, key)
+        else:
+            tasks = [guess_category(line) for line in text.split('\n') if line.strip()]
+
+        tasks = [t for t in tasks if t]
+
+        # 2. SAVE TO DATABASE (one transaction, no per-task lookups)
+        diff_map = {1: 'Easy', 2: 'Medium', 3: 'Hard', 4: 'Epic'}
+
+        # Preload the user's categories once: name -> id (oldest goal wins on duplicate names)
+        goal_ids = dict(
+            db.session.query(Goal.name, Goal.id)
+            .filter(Goal.user_id == current_user.id)
+            .order_by(Goal.id.desc())
+            .all()
+        )
+
+        # Create every missing category in a single bulk insert
+        missing = {t.get('category', 'General') for t in tasks} - goal_ids.keys()
+        if missing:
+            db.session.execute(insert(Goal), [{'name': cat, 'user_id': current_user.id} for cat in missing])
+            goal_ids.update(
+                db.session.query(Goal.name, Goal.id)
+                .filter(Goal.user_id == current_user.id, Goal.name.in_(missing))
+                .order_by(Goal.id.desc())
+                .all()
+            )
+
+        habit_rows = []
+        for t in tasks:
+            # Map Difficulty Number to Name
+            diff_val = t.get('difficulty', 1)
+            # Handle if AI returns a string "Easy" instead of number
+            if isinstance(diff_val, str):
+                diff_name = diff_val
+            else:
+                diff_name = diff_map.get(diff_val, 'Easy')
+
+            # Parse Date
+            date_obj = None
+            if t.get('target_date'):
+                try:
+                    date_obj = datetime.strptime(t['target_date'], '%Y-%m-%d').date()
+                except:
+                    date_obj = None
+
+            habit_rows.append({
+                'name': t['name'],
+                'goal_id': goal_ids[t.get('category', 'General')],
+                'difficulty': diff_name,
+                'xp_value': 10 * (diff_val if isinstance(diff_val, int) else 1),
+                'completed': False,
+                'description': t.get('description', ''),
+                'target_date': date_obj,
+                'stat_type': t.get('stat_type', 'INT')
+            })
+
+        # Insert all habits with one executemany
+        if habit_rows:
+            db.session.execute(insert(Habit), habit_rows)
+
+        db.session.commit()
+        flash(f"Successfully imported {len(tasks)} tasks!", "success")
+        return redirect(url_for('core.dashboard'))
+
+    return render_template('import_tasks.html')
+
+@bp.route('/operations/backlog')
+@login_required
+def backlog_calculator():
+    return render_template('backlog_calculator.html')
+
+@bp.route('/audit')
+@login_required
+def audit():
+    today = date.today()
+    tasks = Habit.query.join(Goal).filter(
+        Goal.user_id == current_user.id,
+        Habit.target_date < today,
+        Habit.completed == False
+    ).all()
+    return render_template('audit.html', tasks=tasks)
+
+@bp.route('/process_audit', methods=['POST'])
+@login_required
+def process_audit():
+    action = request.form.get('action')
+    ids = request.form.getlist('task_ids')
+    today = date.today()
+
+    for tid in ids:
+        h = db.session.get(Habit, int(tid))
+        if h and h.goal.user_id == current_user.id:
+            if action == 'delete': db.session.delete(h)
+            elif action == 'today': h.target_date = today
+            elif action == 'tomorrow': h.target_date = today + timedelta(days=1)
+            elif action == 'unschedule': h.target_date = None
+
+    db.session.commit()
+    return redirect(url_for('core.audit'))
+
+@bp.route('/profile')
+@login_required
+@etag_cached('history')
+def profile():
+    today = date.today()
+
+    # 1. Query the database for the current month's stat totals
+    monthly_stats_raw = db.session.query(
+        QuestHistory.stat_type,
+        func.sum(QuestHistory.xp_gained)
+    ).filter(
+        QuestHistory.user_id == current_user.id,
+        month_window(QuestHistory.date_completed, today.year, today.month)
+    ).group_by(QuestHistory.stat_type).all()
+
+    # 2. ENHANCEMENT: Pre-fill base dictionary with 0s to guarantee the template never crashes
+    monthly_stats = {
+        'STR': 0,
+        'INT': 0,
+        'WIS': 0,
+        'CON': 0,
+        'CHA': 0
+    }
+
+    # 3. Populate with actual database data (Safely handling None values)
+    for stat_type, xp in monthly_stats_raw:
+        if stat_type in monthly_stats and xp is not None:
+            monthly_stats[stat_type] = int(xp)
+
+    # 4. Render the template and pass the data
+    return render_template('profile.html', user=current_user, monthly_stats=monthly_stats)
+
+@bp.route('/edit_goal', methods=['POST'])
+@login_required
+def edit_goal():
+    gid = request.form.get('goal_id')
+    name = request.form.get('name')
+    g = db.session.get(Goal, gid)
+    if g and g.user_id == current_user.id:
+        g.name = name
+        db.session.commit()
+    return redirect(url_for('core.dashboard'))
+
+# --- PASSWORD RESET ---
+# --- PASSWORD RESET ---
+@bp.route('/reset_password_request', methods=['GET', 'POST'])
+def reset_request():
+    if request.method == 'POST':
+        user = User.query.filter_by(email=request.form.get('email')).first()
+        if user:
+            token = _reset_serializer().dumps(user.email, salt='recover-key')
+            base_url = request.host_url.rstrip('/')
+            path = url_for('core.reset_token', token=token)
+            link = f"{base_url}{path}"
+
+            # --- SEND EMAIL VIA BREVO HTTP API ---
+            url = "https://api.brevo.com/v3/smtp/email"
+            headers = {
+                "accept": "application/json",
+                "api-key": os.getenv('BREVO_API_KEY'),
+                "content-type": "application/json"
+            }
+            payload = {
+                "sender": {"name": "LifeRPG Command", "email": os.getenv('MAIL_USERNAME')},
+                "to": [{"email": user.email}],
+                "subject": "LifeRPG - Password Reset",
+                "htmlContent": f"<html><body><h3>Password Reset Request</h3><p>Click the link below to reset your LifeRPG password:</p><p><a href='{link}'>{link}</a></p></body></html>"
+            }
+
+            try:
+                # This bypasses the firewall!
+                requests.post(url, json=payload, headers=headers)
+                flash('Email sent! Please check your inbox.', 'info')
+            except Exception as e:
+                flash('Error communicating with mail server.', 'danger')
+
+            return redirect(url_for('core.login'))
+
+        flash('Email not found.', 'danger')
+    return render_template('reset_request.html')
+
+@bp.route('/reset_password/<token>', methods=['GET', 'POST'])
+def reset_token(token):
+    try:
+        email = _reset_serializer().loads(token, salt='recover-key', max_age=1800)
+    except:
+        flash('Invalid token.', 'danger')
+        return redirect(url_for('core.reset_request'))
+
+    if request.method == 'POST':
+        user = User.query.filter_by(email=email).first()
+        # FIXED: Using bcrypt
+        user.password = bcrypt.generate_password_hash(request.form.get('password')).decode('utf-8')
+        db.session.commit()
+        flash('Password updated.', 'success')
+        return redirect(url_for('core.login'))
+    return render_template('reset_token.html')
+
+# --- VIRAL GROWTH: INSTAGRAM UNLOCK ---
+@bp.route('/unlock_beta', methods=['POST'])
+@login_required
+def unlock_beta():
+    # Instantly upgrade the user to PRO
+    current_user.is_pro = True
+    db.session.commit()
+    return {"status": "success", "message": "Unlocked!"}, 200
@@ -0,0 +1,183 @@
+import threading
+from datetime import datetime, timedelta
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
+from flask_login import login_required, current_user
+from sqlalchemy import insert, update, or_
+
+from extensions import db
+from models import User, Goal, Habit, Notification
+from utils import generate_genie_questions, generate_genie_blueprint
+
+bp = Blueprint('genie', __name__)
+
+# --- VIP GENIE FEATURE ---
+# --- VIP GENIE FEATURE ---
+@bp.route('/genie', methods=['GET', 'POST'])
+@login_required
+def genie():
+    # 1. Lock out Guests completely
+    if current_user.is_guest:
+        flash("The Genie only appears to Masters who engrave their name in the registry. Please register.", "warning")
+        return redirect(url_for('core.dashboard'))
+
+    # --- AUTO-HEAL OLD ACCOUNTS ---
+    if current_user.has_used_free_wish is None:
+        current_user.has_used_free_wish = False
+        db.session.commit()
+    if current_user.genie_wishes is None and current_user.is_pro:
+        current_user.genie_wishes = 3
+        db.session.commit()
+
+    # 2. Check VIP Limits
+    # Free users get 1 lifetime wish. Pro users get 3 per week.
+    if not current_user.is_pro:
+        if current_user.has_used_free_wish:
+            flash("Your free lifetime wish has been exhausted. Upgrade to Pro to summon the Genie again.", "info")
+            return redirect(url_for('core.dashboard'))
+    else:
+        # Check weekly resets for Pro users
+        if current_user.genie_wishes <= 0:
+            flash("The Genie rests. Your 3 wishes will replenish next week.", "info")
+            return redirect(url_for('core.dashboard'))
+
+    # 3. Handle the Wish Submission
+    if request.method == 'POST':
+        wish = request.form.get('wish')
+
+        # Ask Gemini to generate the 3 specific questions
+        questions = generate_genie_questions(wish)
+
+        # Send the user to the questionnaire room
+        return render_template('genie_questions.html', wish=wish, questions=questions)
+
+    # 4. Show the magical room
+    return render_template('genie.html')
+
+# --- VIP GENIE: QUEST GENERATOR ---
+# The blueprint is forged on a background thread so the request returns at once
+# with a "forging" placeholder Goal that the dashboard polls.
+
+def _forge_genie_quest(flask_app, goal_id, user_id, wish, qa_pairs):
+    with flask_app.app_context():
+        blueprint = generate_genie_blueprint(wish, *qa_pairs)
+        try:
+            goal = db.session.get(Goal, goal_id)
+            user = db.session.get(User, user_id)
+            if not goal or not user:
+                return  # Deleted while the Genie was working
+
+            if not blueprint:
+                raise ValueError("Empty blueprint")
+
+            # 1. Spend the wish only if one is still available (same transaction as the quest)
+            if user.is_pro:
+                spent = db.session.execute(
+                    update(User)
+                    .where(User.id == user_id, User.genie_wishes > 0)
+                    .values(genie_wishes=User.genie_wishes - 1)
+                ).rowcount
+            else:
+                spent = db.session.execute(
+                    update(User)
+                    .where(User.id == user_id, or_(User.has_used_free_wish == False, User.has_used_free_wish.is_(None)))
+                    .values(has_used_free_wish=True)
+                ).rowcount
+            if not spent:
+                raise ValueError("No wishes left")
+
+            # 2. Promote the placeholder into the real Master Quest
+            goal.name = f"🧞‍♂️ {blueprint['goal_name']}"
+            goal.forge_status = None
+
+            # 3. Daily habit + milestones (as habits, so they show on the dashboard with notes) in one insert
+            time_label = blueprint['habit'].get('time_of_day', 'Anytime')
+            habit_rows = [{
+                'name': f"🧞‍♂️ DAILY: {blueprint['habit']['name']} [{time_label}]",
+                'goal_id': goal_id,
+                'is_daily': True,
+                'difficulty': "Medium",
+                'description': "Daily momentum builder for your Master Quest."
+            }]
+            for t in blueprint['tasks']:
+                habit_rows.append({
+                    'name': f"🧞‍♂️ MILESTONE: {t['title']}",
+                    'description': t['description'],
+                    'goal_id': goal_id,
+                    'is_daily': False,
+                    'difficulty': "Epic",
+                    'xp_value': 100
+                })
+            db.session.execute(insert(Habit), habit_rows)
+            db.session.commit()
+
+        except Exception as e:
+            # Nothing was spent: drop the placeholder and tell the player
+            db.session.rollback()
+            print(f"[GenieForge] Error: {e}")
+            goal = db.session.get(Goal, goal_id)
+            if goal:
+                db.session.delete(goal)
+            db.session.add(Notification(
+                user_id=user_id,
+                message="The Genie's magic was interrupted by a cosmic storm (AI Error). Your wish was not spent — please try again.",
+                type='warning'
+            ))
+            db.session.commit()
+
+def expire_stale_forges(user_id):
+    """Remove this user's placeholders whose forge thread died (restart, crash); returns how many."""
+    # Nothing touches a placeholder while it forges, so updated_at is when it was created
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['GENIE_FORGE_TIMEOUT'])
+    stale = Goal.query.filter(
+        Goal.user_id == user_id, Goal.forge_status == 'forging', Goal.updated_at < cutoff
+    ).all()
+    if not stale:
+        return 0
+    for goal in stale:
+        db.session.delete(goal)
+        db.session.add(Notification(
+            user_id=user_id,
+            message="The Genie lost track of your wish while forging it. Your wish was not spent — please try again.",
+            type='warning'
+        ))
+    db.session.commit()
+    return len(stale)
+
+@bp.route('/genie_generate_quest', methods=['POST'])
+@login_required
+def genie_generate_quest():
+    # 1. Grab the original wish and the answers
+    wish = request.form.get('wish')
+    qa_pairs = []
+    for i in (1, 2, 3):
+        qa_pairs += [request.form.get(f'question_{i}'), request.form.get(f'answer_{i}')]
+
+    # 2. Drop a placeholder Goal the dashboard can show (and poll) right away
+    placeholder = Goal(
+        name=f"🧞‍♂️ Forging: {(wish or 'Master Quest')[:120]}",
+        user_id=current_user.id,
+        is_genie_quest=True,
+        forge_status='forging'
+    )
+    db.session.add(placeholder)
+    db.session.commit()
+
+    # 3. Forge the Master Blueprint in the background
+    threading.Thread(
+        target=_forge_genie_quest,
+        args=(current_app._get_current_object(), placeholder.id, current_user.id, wish, qa_pairs),
+        daemon=True
+    ).start()
+
+    flash("The Genie is forging your Master Quest... it will appear in your Active Protocols shortly.", "info")
+    return redirect(url_for('core.dashboard'))
+
+@bp.route('/genie_forge_status/<int:goal_id>')
+@login_required
+def genie_forge_status(goal_id):
+    expire_stale_forges(current_user.id)
+    goal = db.session.get(Goal, goal_id)
+    if not goal or goal.user_id != current_user.id:
+        return jsonify({'status': 'failed'})
+    return jsonify({'status': goal.forge_status or 'ready'})
@@ -0,0 +1,149 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+from flask_login import login_required, current_user
+from werkzeug.utils import secure_filename
+
+from extensions import db
+
+bp = Blueprint('penalty', __name__)
+
+PENALTY_LOCK_HOURS = 10
+PENALTY_ALLOWED_ENDPOINTS = {"penalty.penalty_zone", "core.logout", "static"}
+# Never checked at all (no user load): assets and the background reminder channel
+PENALTY_EXEMPT_ENDPOINTS = {"static", "asset", "core.service_worker", "core.get_reminders", "core.reminder_stream"}
+PENALTY_TASKS = [
+    "Run 5 Kilometers",
+    "Deep Clean your primary workspace",
+    "No social media for 12 hours",
+    "Complete a 60-minute focused study sprint",
+]
+
+def _parse_session_datetime(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+def _clear_penalty_session():
+    for key in [
+        "penalty_unlock_at",
+        "penalty_task",
+        "penalty_proof_submitted",
+        "penalty_proof_path",
+        "penalty_minimized",
+        "penalty_notice_shown",
+    ]:
+        session.pop(key, None)
+
+def _ensure_penalty_window():
+    unlock_at = _parse_session_datetime(session.get("penalty_unlock_at"))
+    if unlock_at:
+        return unlock_at
+
+    unlock_at = datetime.utcnow() + timedelta(hours=PENALTY_LOCK_HOURS)
+    session["penalty_unlock_at"] = unlock_at.isoformat()
+    session["penalty_task"] = session.get("penalty_task") or random.choice(PENALTY_TASKS)
+    session["penalty_proof_submitted"] = False
+    session["penalty_minimized"] = False
+    session["penalty_notice_shown"] = False
+    return unlock_at
+
+@bp.before_app_request
+def check_penalty_zone():
+    endpoint = request.endpoint or ""
+    if endpoint in PENALTY_EXEMPT_ENDPOINTS:
+        return None
+
+    # 1. Ignore if user is not logged in
+    if not current_user.is_authenticated:
+        return None
+
+    # 2. Check if the user is trapped in the Penalty Zone
+    if current_user.in_penalty_zone:
+
+        # --- ADMIN SECRETS: OVERRIDE BACKDOOR ---
+        if current_user.is_admin and session.get('penalty_minimized') and endpoint != 'penalty.penalty_zone':
+            return None  # Let the admin pass through freely
+
+        # 3. Lock down all other routes
+        if endpoint not in PENALTY_ALLOWED_ENDPOINTS and not endpoint.startswith("static"):
+            return redirect(url_for('penalty.penalty_zone'))
+
+    # 4. Check if the 10-hour timer has expired automatically
+    unlock_at = _parse_session_datetime(session.get("penalty_unlock_at"))
+    if unlock_at:
+        now = datetime.utcnow()
+        if now >= unlock_at:
+            _clear_penalty_session()
+            if current_user.in_penalty_zone:
+                current_user.in_penalty_zone = False
+                db.session.commit()
+            flash("Penalty timer expired. System lockdown lifted automatically.", "success")
+            return None
+
+@bp.route('/penalty_zone', methods=['GET', 'POST'])
+@login_required
+def penalty_zone():
+    # If they aren't trapped in the database, send them away safely
+    if not current_user.in_penalty_zone:
+        if 'penalty_minimized' in session:
+            session.pop('penalty_minimized')
+        return redirect(url_for('core.dashboard'))
+
+    if request.method == 'POST':
+        action = request.form.get('action', '').strip()
+
+        # --- 1. HANDLE IMAGE UPLOAD ---
+        # Checks for 'proof_image' (our HTML) or 'proof_file' (your custom code)
+        file = request.files.get('proof_image') or request.files.get('proof_file')
+        if file and file.filename:
+            filename = secure_filename(file.filename)
+            stamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+            final_name = f"{current_user.id}_{stamp}_{filename}"
+            upload_dir = os.path.join(current_app.root_path, 'static', 'uploads')
+            os.makedirs(upload_dir, exist_ok=True)
+            file.save(os.path.join(upload_dir, final_name))
+
+            # Save it to the Database so it is permanent!
+            current_user.penalty_proof_path = final_name
+            db.session.commit()
+            flash('Proof uploaded. Awaiting Administrator review.', 'info')
+        elif action not in ['minimize', 'toggle_minimize', 'forgive', 'admin_release']:
+            flash('Upload failed. Please attach a valid file.', 'warning')
+
+        # --- 2. ADMIN MINIMIZE ---
+        if action in ['minimize', 'toggle_minimize'] and current_user.is_admin:
+            is_minimized = bool(session.get('penalty_minimized', False))
+            session['penalty_minimized'] = not is_minimized
+            flash('System Administrator Override Toggled.', 'warning')
+            return redirect(url_for('core.dashboard'))
+
+        # --- 3. ADMIN FORCE UNLOCK ---
+        if action in ['forgive', 'admin_release'] and current_user.is_admin:
+            # Cure the database lock!
+            current_user.in_penalty_zone = False
+            current_user.penalty_proof_path = None
+            current_user.penalty_task = None
+            db.session.commit()
+            if 'penalty_minimized' in session:
+                session.pop('penalty_minimized')
+            flash('Administrator override executed. Penalty window unlocked.', 'success')
+            return redirect(url_for('core.dashboard'))
+
+        return redirect(url_for('penalty.penalty_zone'))
+
+    # Static timer value for now (4 hours = 14400 seconds)
+    time_remaining = 14400
+
+    return render_template(
+        'penalty_zone.html',
+        task=current_user.penalty_task,
+        proof_path=current_user.penalty_proof_path,
+        time_remaining=time_remaining,
+        user=current_user
+    )
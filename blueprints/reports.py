@@ -0,0 +1,351 @@
+import io
+import os
+import csv
+import zlib
+import glob
+import hashlib
+import calendar
+import threading
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime, date, timedelta
+
+from flask import Blueprint, render_template, request, Response, current_app, send_file, stream_with_context
+from flask_login import login_required, current_user
+from sqlalchemy import func, extract, select
+
+from extensions import db
+from database import month_window, replica_read
+from conditional import etag_cached
+from models import QuestHistory
+from archive import iter_account_archive
+
+bp = Blueprint('reports', __name__)
+
+CSV_YIELD_PER = 1000     # rows fetched per server-side batch
+CSV_CHUNK_ROWS = 500     # rows per chunk sent to the client
+
+# --- STREAMING CSV ---
+# Exports never hold the whole history in memory: rows come off the cursor in
+# batches and leave as CSV chunks (optionally gzip-compressed on the fly).
+def _csv_chunks(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _csv_response(header, rows, filename):
+    """Stream rows as CSV; `?gzip=1` sends a .csv.gz instead."""
+    chunks = _csv_chunks(header, rows)
+    if request.args.get('gzip') == '1':
+        return Response(stream_with_context(_gzip_chunks(chunks)), mimetype='application/gzip',
+                        headers={"Content-Disposition": f"attachment; filename={filename}.gz"})
+    return Response(stream_with_context(chunks), mimetype='text/csv',
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+def _stream_rows(stmt):
+    # Lazy: the query only runs once the response starts streaming
+    yield from db.session.execute(stmt.execution_options(yield_per=CSV_YIELD_PER))
+
+def _get_weasy_html():
+    # WeasyPrint loads Pango/cairo bindings on import — only pay for it when a PDF is requested
+    from weasyprint import HTML
+    return HTML
+
+# --- PDF RENDER POOL ---
+# WeasyPrint is CPU-bound and takes seconds, so it runs in worker processes
+# instead of tying up the web worker. One pool per web process, made on first use.
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+_pdf_jobs = {}  # cache path -> Future, so two clicks don't render the same file twice
+
+def _render_pdf_file(html, path):
+    """Runs inside the pool: render to a temp file, then atomically move it into place."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    _get_weasy_html()(string=html).write_pdf(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+def _get_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=current_app.config['REPORT_PDF_WORKERS'])
+        return _pdf_pool
+
+def _submit_pdf_job(html, path):
+    with _pdf_pool_lock:
+        job = _pdf_jobs.get(path)
+    if job is None:
+        job = _get_pdf_pool().submit(_render_pdf_file, html, path)
+        with _pdf_pool_lock:
+            _pdf_jobs[path] = job
+        job.add_done_callback(lambda _: _pdf_jobs.pop(path, None))
+    return job
+
+def _month_data_version(user, year, month):
+    """Cheap fingerprint of one month of history: any insert/delete/rename changes it."""
+    count, max_id, xp = db.session.query(
+        func.count(QuestHistory.id),
+        func.max(QuestHistory.id),
+        func.sum(QuestHistory.xp_gained)
+    ).filter(
+        QuestHistory.user_id == user.id,
+        month_window(QuestHistory.date_completed, year, month)
+    ).one()
+    raw = f"{count}:{max_id}:{xp}:{user.username}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+@bp.route('/analytics')
+@login_required
+@replica_read
+@etag_cached('history')
+def analytics():
+    today = date.today()
+    try:
+        selected_month = int(request.args.get('month', today.month))
+        selected_year = int(request.args.get('year', today.year))
+    except ValueError:
+        selected_month = today.month
+        selected_year = today.year
+
+    show_all = request.args.get('all') == 'true'
+
+    query = QuestHistory.query.filter_by(user_id=current_user.id)
+
+    if not show_all:
+        query = query.filter(
+            month_window(QuestHistory.date_completed, selected_year, selected_month)
+        )
+
+    history = query.order_by(QuestHistory.date_completed.asc()).all()
+
+    stats = {'STR': 0, 'INT': 0, 'WIS': 0, 'CON': 0, 'CHA': 0}
+    difficulty_counts = {'Easy': 0, 'Medium': 0, 'Hard': 0, 'Epic': 0}
+    difficulty_xp = {'Easy': 0, 'Medium': 0, 'Hard': 0, 'Epic': 0}
+    xp_map = {}
+    weekday_map = {'Mon': 0, 'Tue': 0, 'Wed': 0, 'Thu': 0, 'Fri': 0, 'Sat': 0, 'Sun': 0}
+
+    total_xp = 0
+    total_quests = len(history)
+
+    for h in history:
+        total_xp += h.xp_gained or 0
+
+        if h.stat_type in stats:
+            stats[h.stat_type] += h.xp_gained or 0
+
+        if h.difficulty in difficulty_counts:
+            difficulty_counts[h.difficulty] += 1
+            difficulty_xp[h.difficulty] += h.xp_gained or 0
+
+        if h.date_completed:
+            d_str = h.date_completed.strftime('%Y-%m-%d')
+            xp_map[d_str] = xp_map.get(d_str, 0) + (h.xp_gained or 0)
+            weekday_map[h.date_completed.strftime('%a')] += h.xp_gained or 0
+
+    radar_labels = list(stats.keys())
+    radar_data = list(stats.values())
+
+    active_days_count = len(xp_map)
+    avg_xp_per_quest = int(total_xp / total_quests) if total_quests else 0
+    avg_xp_per_active_day = int(total_xp / active_days_count) if active_days_count else 0
+
+    last_7_days_dates = [today - timedelta(days=i) for i in range(7)]
+    recent_active_days = sum(1 for day in last_7_days_dates if day.strftime('%Y-%m-%d') in xp_map)
+    health_score = int((recent_active_days / 7) * 100)
+
+    sorted_dates = sorted(xp_map.keys())
+    line_labels = []
+    line_data = []
+    daily_line_data = []
+    cumulative_xp = 0
+    for d_str in sorted_dates:
+        cumulative_xp += xp_map.get(d_str, 0)
+        line_labels.append(d_str)
+        line_data.append(cumulative_xp)
+        daily_line_data.append(xp_map.get(d_str, 0))
+
+    if not line_labels:
+        line_labels = [today.strftime('%Y-%m-%d')]
+        line_data = [0]
+        daily_line_data = [0]
+
+    best_day = max(xp_map.items(), key=lambda item: item[1], default=(today.strftime('%Y-%m-%d'), 0))
+
+    current_streak = 0
+    cursor_day = today
+    while cursor_day.strftime('%Y-%m-%d') in xp_map:
+        current_streak += 1
+        cursor_day -= timedelta(days=1)
+
+    rolling_labels = []
+    rolling_data = []
+    for i in range(13, -1, -1):
+        d = today - timedelta(days=i)
+        d_str = d.strftime('%Y-%m-%d')
+        rolling_labels.append(d.strftime('%b %d'))
+        rolling_data.append(xp_map.get(d_str, 0))
+
+    weekday_labels = list(weekday_map.keys())
+    weekday_data = list(weekday_map.values())
+
+    strongest_stat = max(stats.items(), key=lambda item: item[1], default=('STR', 0))
+    most_common_difficulty = max(difficulty_counts.items(), key=lambda item: item[1], default=('Easy', 0))
+    intensity_score = min(100, int((avg_xp_per_active_day / 120) * 100)) if avg_xp_per_active_day else 0
+
+    return render_template('analytics.html',
+                         user=current_user,
+                         radar_data=radar_data,
+                         radar_labels=radar_labels,
+                         stat_totals=stats,
+                         heatmap_data=xp_map,
+                         health_score=health_score,
+                         line_labels=line_labels,
+                         line_data=line_data,
+                         daily_line_data=daily_line_data,
+                         diff_data=list(difficulty_counts.values()),
+                         diff_labels=list(difficulty_counts.keys()),
+                         difficulty_xp=list(difficulty_xp.values()),
+                         bar_labels=rolling_labels,
+                         bar_data=rolling_data,
+                         weekday_labels=weekday_labels,
+                         weekday_data=weekday_data,
+                         total_xp=total_xp,
+                         total_quests=total_quests,
+                         active_days_count=active_days_count,
+                         avg_xp_per_quest=avg_xp_per_quest,
+                         avg_xp_per_active_day=avg_xp_per_active_day,
+                         best_day_label=best_day[0],
+                         best_day_xp=best_day[1],
+                         current_streak=current_streak,
+                         strongest_stat=strongest_stat,
+                         most_common_difficulty=most_common_difficulty,
+                         intensity_score=intensity_score,
+                         selected_month=selected_month,
+                         selected_year=selected_year,
+                         show_all=show_all)
+
+@bp.route('/export')
+@login_required
+def export_data():
+    stmt = select(
+        QuestHistory.date_completed, QuestHistory.name, QuestHistory.stat_type,
+        QuestHistory.xp_gained, QuestHistory.difficulty
+    ).where(QuestHistory.user_id == current_user.id).order_by(QuestHistory.date_completed.desc())
+    rows = ([d, name, 'N/A', stat, xp, diff] for d, name, stat, xp, diff in _stream_rows(stmt))
+    return _csv_response(['Date', 'Task', 'Category', 'Attribute', 'XP', 'Difficulty'], rows, "cosmo_export.csv")
+
+@bp.route('/export/account')
+@login_required
+def export_account():
+    # Full snapshot (goals, habits, history, logs, notifications) as gzipped NDJSON
+    return Response(stream_with_context(_gzip_chunks(iter_account_archive(current_user.id))),
+                    mimetype='application/gzip',
+                    headers={"Content-Disposition": "attachment; filename=liferpg_account.ndjson.gz"})
+
+@bp.route('/history')
+@login_required
+@replica_read
+def history():
+    # Group by month (one grouped query instead of one SUM per month)
+    year_col = extract('year', QuestHistory.date_completed)
+    month_col = extract('month', QuestHistory.date_completed)
+    monthly = db.session.query(year_col, month_col, func.sum(QuestHistory.xp_gained)).filter(
+        QuestHistory.user_id == current_user.id,
+        QuestHistory.date_completed.isnot(None)
+    ).group_by(year_col, month_col).all()
+
+    archives = []
+    for y, m, total in sorted(((int(y), int(m), total) for y, m, total in monthly), reverse=True):
+        archives.append({'year': y, 'month': m, 'name': calendar.month_name[m], 'xp': total or 0})
+
+    return render_template('history.html', archives=archives)
+
+@bp.route('/history_details/<int:year>/<int:month>')
+@login_required
+@replica_read
+@etag_cached('history')
+def history_details(year, month):
+    logs = QuestHistory.query.filter(
+        QuestHistory.user_id == current_user.id,
+        month_window(QuestHistory.date_completed, year, month)
+    ).order_by(QuestHistory.date_completed.desc()).all()
+
+    total = sum(l.xp_gained for l in logs)
+    return render_template('history_details.html', logs=logs, month=calendar.month_name[month], year=year, total_xp=total)
+
+@bp.route('/download_report/<int:year>/<int:month>')
+@login_required
+def download_report(year, month):
+    stmt = select(
+        QuestHistory.date_completed, QuestHistory.name, QuestHistory.stat_type, QuestHistory.xp_gained
+    ).where(
+        QuestHistory.user_id == current_user.id,
+        month_window(QuestHistory.date_completed, year, month)
+    )
+    return _csv_response(['Date', 'Mission', 'Type', 'XP'], _stream_rows(stmt), f"Report_{year}_{month}.csv")
+
+@bp.route('/download_report_pdf/<int:year>/<int:month>')
+@login_required
+def download_report_pdf(year, month):
+    if not 1 <= month <= 12:
+        return Response("Invalid month", status=404)
+
+    # 1. Cached file keyed by (user, year, month, data version)
+    version = _month_data_version(current_user, year, month)
+    cache_dir = os.path.join(current_app.config['REPORT_CACHE_DIR'], str(current_user.id))
+    os.makedirs(cache_dir, exist_ok=True)
+    pdf_path = os.path.join(cache_dir, f"{year}-{month:02d}-{version}.pdf")
+
+    if not os.path.exists(pdf_path):
+        logs = QuestHistory.query.filter(
+            QuestHistory.user_id == current_user.id,
+            month_window(QuestHistory.date_completed, year, month)
+        ).all()
+
+        html = render_template('report_pdf.html', user=current_user, logs=logs,
+                               total_xp=sum(l.xp_gained for l in logs),
+                               mission_count=len(logs), month_name=calendar.month_name[month],
+                               year=year, now=datetime.now().strftime('%Y-%m-%d'))
+
+        # 2. Render in the process pool; if it is slow, tell the browser to come back
+        try:
+            _submit_pdf_job(html, pdf_path).result(timeout=current_app.config['REPORT_PDF_WAIT_SECONDS'])
+        except FutureTimeout:
+            return Response(
+                "<html><head><meta http-equiv='refresh' content='3'></head>"
+                "<body style='font-family: monospace;'>Compiling your mission report... this page will refresh.</body></html>",
+                status=202, headers={"Retry-After": "3"}
+            )
+
+        # Old versions of this month are stale now
+        for stale in glob.glob(os.path.join(cache_dir, f"{year}-{month:02d}-*.pdf")):
+            if stale != pdf_path:
+                with suppress(FileNotFoundError):  # a concurrent request for this month got there first
+                    os.remove(stale)
+
+    # 3. Serve as a static file (ETag/Last-Modified, 304 on revalidation).
+    #    Closed months never change, so the browser may keep them for a day.
+    today = date.today()
+    month_closed = (year, month) < (today.year, today.month)
+    response = send_file(pdf_path, mimetype='application/pdf', as_attachment=True,
+                         download_name=f"Report_{year}_{month}.pdf", conditional=True, etag=True,
+                         max_age=86400 if month_closed else None)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
@@ -0,0 +1,136 @@
+from itertools import chain
+
+from flask import g, has_request_context
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm.util import identity_key
+
+from database import RoutingSession
+from extensions import db
+from models import User, Goal, Habit, QuestHistory, Notification, Tombstone
+
+# ---------------------------------------------------------
+# "THIS USER'S DATA CHANGED" SIGNAL
+# Collects the owners of every row written in a transaction (ORM flushes and
+# insert()/update()/delete() statements) and, once it commits, calls the
+# registered listeners with each user id. In-process caches use this to drop
+# per-user entries. Statements without an ORM object to inspect are
+# attributed to the request's user (session login or API token).
+# ---------------------------------------------------------
+_listeners = []
+
+
+def on_user_change(fn):
+    """Register fn(user_id), called after a commit that touched that user's rows."""
+    _listeners.append(fn)
+    return fn
+
+
+def _request_user_id():
+    if not has_request_context():
+        return None
+    if g.get('api_user_id') is not None:
+        return g.api_user_id
+    # Only look at an already-loaded user; never trigger a load from here
+    return getattr(g.get('_login_user'), 'id', None)
+
+
+def _owner_of(session, obj):
+    if isinstance(obj, User):
+        return obj.id
+    if isinstance(obj, Habit):
+        goal = session.identity_map.get(identity_key(Goal, obj.goal_id))
+        if goal is not None:
+            return goal.user_id
+        # Not loaded (e.g. an admin acting on someone else's habit): ask the
+        # database on the flush's own connection, never guess from the request
+        return session.connection().scalar(select(Goal.user_id).where(Goal.id == obj.goal_id))
+    return getattr(obj, 'user_id', None)
+
+
+def _touched(session):
+    return session.info.setdefault('changed_users', set())
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_flushed(session, flush_context):
+    touched = _touched(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        user_id = _owner_of(session, obj)
+        if user_id is not None:
+            touched.add(user_id)
+
+
+# ---------------------------------------------------------
+# TOMBSTONES (for /api/sync)
+# Every ORM delete of a synced row leaves (user, table, id, time) behind.
+# Bulk wipes record a table-wide tombstone themselves (record_table_reset).
+# Rows removed because their user is being deleted are not recorded.
+# ---------------------------------------------------------
+SYNC_TABLES = {Goal: 'goal', Habit: 'habit', QuestHistory: 'history', Notification: 'notification'}
+
+
+def record_table_reset(user_id, table):
+    """Tell sync clients that every `table` row of the user is gone (bulk delete)."""
+    db.session.add(Tombstone(user_id=user_id, table=table, row_id=None))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_tombstones(session, flush_context):
+    deleted = list(session.deleted)
+    if not deleted:
+        return
+    gone_users = {obj.id for obj in deleted if isinstance(obj, User)}
+    goal_owner = {obj.id: obj.user_id for obj in deleted if isinstance(obj, Goal)}
+
+    rows = []
+    for obj in deleted:
+        table = SYNC_TABLES.get(type(obj))
+        if table is None:
+            continue
+        if isinstance(obj, Habit) and obj.goal_id in goal_owner:
+            user_id = goal_owner[obj.goal_id]
+        else:
+            user_id = _owner_of(session, obj)
+        if user_id is not None and user_id not in gone_users:
+            rows.append({'user_id': user_id, 'table': table, 'row_id': obj.id})
+    if rows:
+        session.connection().execute(insert(Tombstone.__table__), rows)
+
+
+# ---------------------------------------------------------
+# HISTORY OUTLIVES ITS HABIT
+# quest_history.habit_id is ON DELETE SET NULL, but SQLite runs with
+# foreign_keys off and nothing on the ORM side nulls it, so a deleted
+# habit's id would stay behind and could be reused by a new habit. Every
+# ORM habit delete (delete_habit, audit, admin purge, goal cascade) passes
+# through here; where the database enforces the key this matches nothing.
+# ---------------------------------------------------------
+@event.listens_for(RoutingSession, 'after_flush')
+def _detach_history(session, flush_context):
+    habit_ids = [obj.id for obj in session.deleted if isinstance(obj, Habit)]
+    if habit_ids:
+        session.connection().execute(
+            update(QuestHistory.__table__)
+            .where(QuestHistory.habit_id.in_(habit_ids))
+            .values(habit_id=None)
+        )
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _collect_statements(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        user_id = _request_user_id()
+        if user_id is not None:
+            _touched(state.session).add(user_id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _notify(session):
+    for user_id in session.info.pop('changed_users', ()):
+        for fn in _listeners:
+            fn(user_id)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard(session):
+    session.info.pop('changed_users', None)
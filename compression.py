@@ -0,0 +1,109 @@
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# ---------------------------------------------------------
+# RESPONSE COMPRESSION
+# Compresses text responses (HTML, JSON, CSS/JS, CSV, ...) with brotli when the
+# client accepts it and the module is installed, gzip otherwise. Buffered
+# responses under COMPRESS_MIN_SIZE are left alone; streamed ones (CSV
+# exports) are compressed chunk by chunk as they are generated. Anything not
+# in COMPRESS_MIMETYPES (PDF, images, .gz downloads) or already encoded
+# (pre-built /static/dist/ files) passes through, and so does SSE, whose
+# events must not sit in a compressor buffer.
+# ---------------------------------------------------------
+COMPRESS_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'text/xml',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+}
+
+
+class _Gzip:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    name = 'br'
+
+    def __init__(self, quality):
+        self._b = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._b.process(data)
+
+    def finish(self):
+        return self._b.finish()
+
+
+def _encoder(config):
+    if brotli is not None and 'br' in request.accept_encodings:
+        return _Brotli(config['COMPRESS_BROTLI_QUALITY'])
+    if 'gzip' in request.accept_encodings:
+        return _Gzip(config['COMPRESS_LEVEL'])
+    return None
+
+
+def _compressed_stream(chunks, encoder):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response, config):
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    # Unknown length (a generator) counts as big enough
+    if response.content_length is not None and response.content_length < config['COMPRESS_MIN_SIZE']:
+        return response
+    encoder = _encoder(config)
+    response.vary.add('Accept-Encoding')
+    if encoder is None:
+        return response
+
+    if response.is_streamed:
+        response.direct_passthrough = False
+        response.response = _compressed_stream(response.response, encoder)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(encoder.compress(response.get_data()) + encoder.finish())
+
+    response.headers['Content-Encoding'] = encoder.name
+    response.headers.pop('Accept-Ranges', None)  # byte ranges of the original no longer apply
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    if not app.config['COMPRESS_RESPONSES']:
+        return
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, app.config)
@@ -0,0 +1,87 @@
+import hashlib
+import threading
+from datetime import date
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, select
+
+from extensions import db
+from models import User, Goal, Habit, QuestHistory, Notification, Tombstone
+
+# ---------------------------------------------------------
+# CONDITIONAL GET FOR READ-MOSTLY PAGES
+# @etag_cached('history') hashes a per-user data version (newest updated_at
+# of the listed sources + newest tombstone + the user row, which the base
+# template renders) with the URL and today's date into a weak ETag. A
+# matching If-None-Match gets a 304 before the view's queries or template
+# run. The version costs one SELECT of a few indexed max() lookups.
+# ---------------------------------------------------------
+VERSION_SOURCES = {
+    'goals': (Goal.updated_at, Goal.user_id),
+    'habits': (Habit.updated_at, Goal.user_id),
+    'history': (QuestHistory.updated_at, QuestHistory.user_id),
+    'notifications': (Notification.updated_at, Notification.user_id),
+}
+
+_etag_stats = {}   # endpoint -> {'hits': n, 'misses': n, 'bypass': n}
+_etag_lock = threading.Lock()
+
+
+def user_data_version(user_id, sources=()):
+    """Fingerprint of everything `sources` (and the user row) could render for this user."""
+    parts = [
+        select(User.updated_at).where(User.id == user_id).scalar_subquery(),
+        select(func.max(Tombstone.deleted_at)).where(Tombstone.user_id == user_id).scalar_subquery(),
+    ]
+    for name in sources:
+        column, owner = VERSION_SOURCES[name]
+        stmt = select(func.max(column)).where(owner == user_id)
+        if name == 'habits':
+            stmt = stmt.join(Goal, Habit.goal_id == Goal.id)
+        parts.append(stmt.scalar_subquery())
+    row = db.session.execute(select(*parts)).one()
+    return "|".join(str(v) for v in row)
+
+
+def _count(endpoint, outcome):
+    with _etag_lock:
+        stats = _etag_stats.setdefault(endpoint, {'hits': 0, 'misses': 0, 'bypass': 0})
+        stats[outcome] += 1
+
+
+def etag_stats():
+    """Per-endpoint 304 hit rate, for the admin panel."""
+    with _etag_lock:
+        out = {}
+        for endpoint, s in sorted(_etag_stats.items()):
+            checked = s['hits'] + s['misses']
+            out[endpoint] = {**s, 'hit_ratio': round(s['hits'] / checked, 3) if checked else 0.0}
+        return out
+
+
+def etag_cached(*sources):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages would be lost in a 304, so render normally
+            if request.method != 'GET' or not current_user.is_authenticated or session.get('_flashes'):
+                _count(request.endpoint, 'bypass')
+                return view(*args, **kwargs)
+
+            version = user_data_version(current_user.id, sources)
+            raw = f"{request.full_path}|{current_user.id}|{version}|{date.today()}|{current_app.config['ETAG_SALT']}"
+            etag = hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+            if request.if_none_match.contains_weak(etag):
+                _count(request.endpoint, 'hits')
+                response = make_response('', 304)
+            else:
+                _count(request.endpoint, 'misses')
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
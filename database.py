@@ -0,0 +1,146 @@
+import time
+from datetime import date
+
+from flask import current_app, g, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, and_, false
+from sqlalchemy.engine import make_url
+
+# ---------------------------------------------------------
+# SQLITE TUNING PROFILE
+# Applied to every new DB-API connection. WAL lets readers and the single
+# writer run side by side, and busy_timeout makes a writer wait for the
+# lock instead of failing with "database is locked" under gunicorn.
+# ---------------------------------------------------------
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,         # ms to wait for a lock
+    'synchronous': 'NORMAL',      # safe with WAL, far fewer fsyncs than FULL
+    'mmap_size': 268435456,       # 256 MB memory-mapped reads
+    'cache_size': -20000,         # ~20 MB page cache (negative = KiB)
+    'temp_store': 'MEMORY',
+}
+
+
+# Pragmas that would write to the file are skipped on a read-only (mode=ro) replica
+_SQLITE_WRITE_PRAGMAS = {'journal_mode', 'synchronous'}
+
+
+def init_sqlite_pragmas(app, engine, read_only=False):
+    """Attach the pragma profile to `engine` if it is SQLite and the switch is on."""
+    if engine.dialect.name != 'sqlite' or not app.config.get('SQLITE_PRAGMAS_ENABLED', True):
+        return
+
+    pragmas = {**DEFAULT_SQLITE_PRAGMAS, **(app.config.get('SQLITE_PRAGMAS') or {})}
+    if read_only:
+        pragmas = {k: v for k, v in pragmas.items() if k not in _SQLITE_WRITE_PRAGMAS}
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# ---------------------------------------------------------
+# ENGINE / POOL OPTIONS
+# Built from DB_POOL_* config so a server database (PostgreSQL) can be
+# used by just setting DATABASE_URL. Pool sizing is skipped for SQLite,
+# whose in-memory/singleton pools reject it.
+# ---------------------------------------------------------
+def engine_options(config):
+    options = {
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+    }
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+        options['pool_size'] = config.get('DB_POOL_SIZE', 5)
+        options['max_overflow'] = config.get('DB_MAX_OVERFLOW', 10)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+# ---------------------------------------------------------
+# READ/WRITE SPLIT
+# Views marked @replica_read send their SELECTs to the 'replica' bind;
+# flushes and insert()/update()/delete() statements always go to the
+# primary. After a user's own write (either kind) the rest of that request
+# and the next REPLICA_STICKY_SECONDS stay on the primary, so they never
+# read stale data.
+# For local testing with SQLite, point DATABASE_REPLICA_URL at the same
+# file opened read-only: sqlite:///file:/abs/path/rpg.db?mode=ro&uri=true
+# ---------------------------------------------------------
+REPLICA_BIND = 'replica'
+_STICKY_KEY = '_primary_until'
+
+
+def replica_read(view):
+    """Mark a read-only view as safe to serve from the replica."""
+    view._use_replica = True
+    return view
+
+
+def _wants_replica():
+    if not has_request_context():
+        return False
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, '_use_replica', False):
+        return False
+    if g.get('_db_wrote'):
+        return False  # this request already wrote (e.g. check_penalty_zone); read it back from the primary
+    return flask_session.get(_STICKY_KEY, 0) < time.time()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        writing = clause is not None and getattr(clause, 'is_dml', False)
+        if bind is None and not self._flushing and not writing and _wants_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_write(db_session, flush_context):
+    if has_request_context():
+        g._db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _remember_statement_write(state):
+    # insert()/update()/delete() run through session.execute() never flush
+    if (state.is_insert or state.is_update or state.is_delete) and has_request_context():
+        g._db_wrote = True
+
+
+def init_read_replica(app):
+    """Register the replica bind (before db.init_app) if one is configured."""
+    url = app.config.get('DATABASE_REPLICA_URL')
+    if not url:
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds[REPLICA_BIND] = {'url': url, **engine_options({**app.config, 'SQLALCHEMY_DATABASE_URI': url})}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if g.get('_db_wrote'):
+            flask_session[_STICKY_KEY] = time.time() + app.config.get('REPLICA_STICKY_SECONDS', 5)
+        return response
+
+
+# ---------------------------------------------------------
+# PORTABLE QUERY HELPERS
+# ---------------------------------------------------------
+def month_window(column, year, month):
+    """
+    `column` falls in (year, month), as a plain date range: works the same on
+    every backend and can use an index, unlike extract('year'/'month').
+    """
+    if not 1 <= month <= 12:
+        return false()
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return and_(column >= start, column < end)
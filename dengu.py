@@ -1,4 +1,5 @@
-from app import app, db
+from app import create_app, db
+app = create_app(minimal=True)
 with app.app_context():
     db.create_all()
-    print("Database tables created successfully!")
\ No newline at end of file
+    print("Database tables created successfully!")
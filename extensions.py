@@ -2,9 +2,15 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
+from flask_bcrypt import Bcrypt
+from flask_mail import Mail
 
-# Initialize all the extensions
-db = SQLAlchemy()
+from database import RoutingSession
+
+# Initialize all the extensions (bound to an app inside create_app)
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # replica-aware, see database.py
 login_manager = LoginManager()
 migrate = Migrate()
-csrf = CSRFProtect()
\ No newline at end of file
+csrf = CSRFProtect()  # Not enabled yet: the widget/fetch endpoints post without tokens
+bcrypt = Bcrypt()
+mail = Mail()
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from conditional import user_data_version
+
+# ---------------------------------------------------------
+# TEMPLATE FRAGMENT CACHE
+#   {% cache 'dashboard-goals', user.id, fragment_version %} ... {% endcache %}
+# Keeps the rendered HTML of a block per (fragment, user) together with the
+# data version it was rendered from; a different version re-renders and
+# replaces it, so nothing has to be invalidated explicitly. A falsy version
+# renders without caching. Tier 1 is a bounded in-process LRU; tier 2
+# (FRAGMENT_CACHE_DIR, optional) is one file per (fragment, user) shared by
+# every worker on the box and surviving restarts.
+# ---------------------------------------------------------
+_fragments = OrderedDict()   # (name, owner) -> (version, html)
+_fragment_lock = threading.Lock()
+_fragment_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+
+def fragment_version(user_id, *sources):
+    """Version string for fragments built from `sources` (see conditional.VERSION_SOURCES)."""
+    return f"{user_data_version(user_id, sources)}|{date.today()}|{current_app.config['ETAG_SALT']}"
+
+
+def _disk_path(name, owner):
+    folder = current_app.config.get('FRAGMENT_CACHE_DIR')
+    if not folder:
+        return None
+    digest = hashlib.sha1(f"{name}:{owner}".encode()).hexdigest()
+    return os.path.join(folder, f"{digest}.html")
+
+
+def _disk_get(path, version):
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.readline().rstrip('\n') == version:
+                return f.read()
+    except OSError:
+        pass
+    return None
+
+
+def _disk_put(path, version, html):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version + '\n' + html)
+        os.replace(tmp, path)  # readers never see a half-written file
+    except OSError as e:
+        print(f"[Fragments] Disk write failed: {e}")
+
+
+def _remember(key, version, html):
+    with _fragment_lock:
+        _fragments[key] = (version, html)
+        _fragments.move_to_end(key)
+        while len(_fragments) > current_app.config['FRAGMENT_CACHE_SIZE']:
+            _fragments.popitem(last=False)
+
+
+def cached_fragment(name, owner, version, render):
+    key = (name, owner)
+    with _fragment_lock:
+        hit = _fragments.get(key)
+        if hit and hit[0] == version:
+            _fragments.move_to_end(key)
+            _fragment_stats['hits'] += 1
+            return hit[1]
+
+    path = _disk_path(name, owner)
+    html = _disk_get(path, version) if path else None
+    if html is not None:
+        with _fragment_lock:
+            _fragment_stats['disk_hits'] += 1
+        _remember(key, version, html)
+        return html
+
+    html = str(render())
+    with _fragment_lock:
+        _fragment_stats['misses'] += 1
+    _remember(key, version, html)
+    if path:
+        _disk_put(path, version, html)
+    return html
+
+
+def fragment_cache_stats():
+    """Snapshot of the fragment cache for the admin panel."""
+    with _fragment_lock:
+        hits = _fragment_stats['hits'] + _fragment_stats['disk_hits']
+        total = hits + _fragment_stats['misses']
+        return {
+            **_fragment_stats,
+            'size': len(_fragments),
+            'capacity': current_app.config['FRAGMENT_CACHE_SIZE'],
+            'disk': bool(current_app.config.get('FRAGMENT_CACHE_DIR')),
+            'hit_ratio': round(hits / total, 3) if total else 0.0,
+        }
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        if len(args) != 3:
+            parser.fail("cache takes a fragment name, an owner and a version", lineno)
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, name, owner, version, caller):
+        if not version:
+            return caller()
+        return Markup(cached_fragment(name, owner, version, caller))
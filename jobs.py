@@ -0,0 +1,186 @@
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, update, delete, func, text
+
+from extensions import db
+from database import month_window
+from models import (User, Goal, Habit, Task, QuestHistory, Feedback, Notification, DailyLog,
+                    ApiToken, ApiOperation, Tombstone, month_key)
+
+# ---------------------------------------------------------
+# MONTHLY XP COUNTER RECONCILIATION
+# User.monthly_xp is maintained incrementally by add_progress(); this
+# re-derives it from QuestHistory (one grouped scan) and reports/fixes drift.
+# ---------------------------------------------------------
+RECONCILE_BATCH = 1000
+
+
+def _month_history_xp(user_col):
+    today = date.today()
+    return (
+        select(func.coalesce(func.sum(QuestHistory.xp_gained), 0))
+        .where(QuestHistory.user_id == user_col,
+               month_window(QuestHistory.date_completed, today.year, today.month))
+        .scalar_subquery()
+    )
+
+
+def recount_monthly_xp(user_ids):
+    """Rebuild the counter for `user_ids` from history in one UPDATE. Does not commit."""
+    if not user_ids:
+        return
+    db.session.execute(
+        update(User).where(User.id.in_(list(user_ids)))
+        .values(monthly_xp=_month_history_xp(User.id), monthly_xp_month=month_key())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def find_monthly_xp_drift():
+    """Return [(user_id, counter, actual)] for every user whose counter is off."""
+    today = date.today()
+    key = month_key(today)
+    actual = dict(db.session.execute(
+        select(QuestHistory.user_id, func.sum(QuestHistory.xp_gained))
+        .where(month_window(QuestHistory.date_completed, today.year, today.month))
+        .group_by(QuestHistory.user_id)
+    ).all())
+
+    drift = []
+    stmt = select(User.id, User.monthly_xp, User.monthly_xp_month).execution_options(yield_per=RECONCILE_BATCH)
+    for uid, counter, month in db.session.execute(stmt):
+        counter = (counter or 0) if month == key else 0
+        real = actual.get(uid) or 0
+        if counter != real:
+            drift.append((uid, counter, real))
+    return drift
+
+
+# ---------------------------------------------------------
+# GUEST ACCOUNT PURGE
+# Guests idle for GUEST_TTL_DAYS (by user.updated_at, which the daily
+# dashboard check-in bumps) are deleted with everything they own, one batch
+# of users per transaction, children before parents. Plain DELETE statements:
+# no rows are loaded, and the ORM's per-row tombstones are not needed for
+# accounts that no longer exist.
+# ---------------------------------------------------------
+GUEST_PURGE_BATCH = 500
+
+
+def expired_guests(cutoff):
+    return select(User.id).where(User.is_guest.is_(True), User.updated_at < cutoff)
+
+
+def _guest_deletes(user_ids):
+    goal_ids = select(Goal.id).where(Goal.user_id.in_(user_ids))
+    return [
+        ('history', delete(QuestHistory).where(QuestHistory.user_id.in_(user_ids))),
+        ('habit', delete(Habit).where(Habit.goal_id.in_(goal_ids))),
+        ('goal', delete(Goal).where(Goal.user_id.in_(user_ids))),
+        ('task', delete(Task).where(Task.user_id.in_(user_ids))),
+        ('notification', delete(Notification).where(Notification.user_id.in_(user_ids))),
+        ('daily_log', delete(DailyLog).where(DailyLog.user_id.in_(user_ids))),
+        ('feedback', delete(Feedback).where(Feedback.user_id.in_(user_ids))),
+        ('api_token', delete(ApiToken).where(ApiToken.user_id.in_(user_ids))),
+        ('api_operation', delete(ApiOperation).where(ApiOperation.user_id.in_(user_ids))),
+        ('tombstone', delete(Tombstone).where(Tombstone.user_id.in_(user_ids))),
+        ('user', delete(User).where(User.id.in_(user_ids))),
+    ]
+
+
+def purge_expired_guests(cutoff, batch=GUEST_PURGE_BATCH):
+    """Delete guests idle since before `cutoff`, `batch` users per commit. Returns {table: rows}."""
+    reclaimed = {}
+    while True:
+        user_ids = db.session.scalars(expired_guests(cutoff).order_by(User.id).limit(batch)).all()
+        if not user_ids:
+            return reclaimed
+        for table, stmt in _guest_deletes(user_ids):
+            n = db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+            reclaimed[table] = reclaimed.get(table, 0) + n
+        db.session.commit()
+
+
+def database_size():
+    """(bytes used, bytes in free pages) for SQLite/Postgres, else (None, None)."""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        page_size = db.session.execute(text('PRAGMA page_size')).scalar()
+        pages = db.session.execute(text('PRAGMA page_count')).scalar()
+        free = db.session.execute(text('PRAGMA freelist_count')).scalar()
+        return pages * page_size, free * page_size
+    if dialect == 'postgresql':
+        return db.session.execute(text('SELECT pg_database_size(current_database())')).scalar(), None
+    return None, None
+
+
+def _mb(n):
+    return 'n/a' if n is None else f"{n / 1048576:.1f} MB"
+
+
+jobs_cli = AppGroup('jobs', help='Periodic maintenance jobs.')
+
+
+@jobs_cli.command('reconcile-xp')
+@click.option('--fix', is_flag=True, help='Rewrite drifted counters from history.')
+def reconcile_xp_command(fix):
+    """Verify monthly XP counters against QuestHistory."""
+    drift = find_monthly_xp_drift()
+    for uid, counter, real in drift[:50]:
+        click.echo(f"user {uid}: counter {counter} != history {real}")
+    if fix and drift:
+        ids = [uid for uid, *_ in drift]
+        for i in range(0, len(ids), RECONCILE_BATCH):
+            recount_monthly_xp(ids[i:i + RECONCILE_BATCH])
+        db.session.commit()
+    click.echo(f"{len(drift)} drifted counter(s){' fixed' if fix and drift else ''}.")
+
+
+@jobs_cli.command('prune-api-ops')
+@click.option('--days', default=30, show_default=True, help='Keep operation ids this many days.')
+def prune_api_ops_command(days):
+    """Forget widget operation ids older than DAYS (retries come within minutes)."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    n = db.session.execute(delete(ApiOperation).where(ApiOperation.created_at < cutoff)).rowcount
+    db.session.commit()
+    click.echo(f"Pruned {n} operation id(s).")
+
+
+@jobs_cli.command('prune-tombstones')
+def prune_tombstones_command():
+    """Drop sync tombstones past SYNC_TOMBSTONE_DAYS (older cursors get a full sync anyway)."""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS'])
+    n = db.session.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff)).rowcount
+    db.session.commit()
+    click.echo(f"Pruned {n} tombstone(s).")
+
+
+@jobs_cli.command('purge-guests')
+@click.option('--days', type=int, default=None, help='Idle days before a guest expires [default: GUEST_TTL_DAYS].')
+@click.option('--batch', default=GUEST_PURGE_BATCH, show_default=True, help='Guests deleted per transaction.')
+@click.option('--dry-run', is_flag=True, help='Only count expired guests.')
+def purge_guests_command(days, batch, dry_run):
+    """Delete expired guest accounts and everything they own."""
+    days = current_app.config['GUEST_TTL_DAYS'] if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    if dry_run:
+        n = db.session.scalar(select(func.count()).select_from(expired_guests(cutoff).subquery()))
+        click.echo(f"{n} guest(s) idle for more than {days} day(s).")
+        return
+
+    before, _ = database_size()
+    reclaimed = purge_expired_guests(cutoff, batch)
+    after, free = database_size()
+
+    click.echo(f"Purged {reclaimed.get('user', 0)} guest(s) idle for more than {days} day(s).")
+    for table, n in reclaimed.items():
+        if n:
+            click.echo(f"  {table:<14} {n} row(s)")
+    click.echo(f"  {'total':<14} {sum(reclaimed.values())} row(s)")
+    line = f"Database: {_mb(before)} -> {_mb(after)}"
+    if free:
+        line += f" ({_mb(free)} in free pages, reused before the file grows; VACUUM returns them to the OS)"
+    click.echo(line)
@@ -0,0 +1,33 @@
+"""detach history from deleted habits
+
+Revision ID: b6e1f4a9c258
+Revises: a8d4e2f6c173
+Create Date: 2026-10-19 23:02:14.518930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1f4a9c258'
+down_revision = 'a8d4e2f6c173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite never applied ON DELETE SET NULL (foreign_keys is off), so history
+    # rows of habits deleted since habit_id was added still point at them
+    history = sa.table('quest_history', sa.column('habit_id'))
+    habit = sa.table('habit', sa.column('id'))
+    op.execute(
+        history.update()
+        .where(history.c.habit_id.is_not(None), history.c.habit_id.not_in(sa.select(habit.c.id)))
+        .values(habit_id=None)
+    )
+
+
+def downgrade():
+    # Data-only fix: the dangling ids are not worth restoring
+    pass
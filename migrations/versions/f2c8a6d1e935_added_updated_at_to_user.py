@@ -0,0 +1,32 @@
+"""added updated_at to user
+
+Revision ID: f2c8a6d1e935
+Revises: e7a4d3b8c612
+Create Date: 2026-10-19 21:04:12.507316
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a6d1e935'
+down_revision = 'e7a4d3b8c612'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # add nullable, stamp existing rows, then make it NOT NULL
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute(sa.table('user', sa.column('updated_at')).update().values(updated_at=datetime.utcnow()))
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -1,5 +1,7 @@
 from flask_login import UserMixin
 from datetime import datetime, date
+from sqlalchemy import update, func, case
+from sqlalchemy.orm.util import identity_key
 from extensions import db  # Importing from extensions to avoid loops
 
 # --- 1. TASK CLASS ---
@@ -22,10 +24,21 @@ class Goal(db.Model):
 
     # --- NEW GENIE ADDITIONS ---
     is_genie_quest = db.Column(db.Boolean, default=False) # Identifies it as a Master Quest
+    forge_status = db.Column(db.String(20), nullable=True) # 'forging' while the Genie builds it in the background
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)  # /api/sync cursor
 
     # Relationship to Habits
     habits = db.relationship('Habit', backref='goal', cascade="all, delete-orphan", lazy=True)
 
+    __table_args__ = (db.Index('ix_goal_user_updated', 'user_id', 'updated_at'),)
+
+# Difficulty -> rank used to order missions (hardest first); unknown sorts last
+DIFFICULTY_RANKS = {'Easy': 1, 'Medium': 2, 'Hard': 3, 'Epic': 4}
+
+def _difficulty_priority(context):
+    # Column default, so bulk insert(Habit) paths get it too
+    return DIFFICULTY_RANKS.get(context.get_current_parameters().get('difficulty'), 0)
+
 # --- 3. HABIT CLASS ---
 class Habit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -38,6 +51,15 @@ class Habit(db.Model):
     is_daily = db.Column(db.Boolean, default=False)
     target_date = db.Column(db.Date, nullable=True)
     description = db.Column(db.String(500), nullable=True)
+    priority = db.Column(db.Integer, default=_difficulty_priority, nullable=False, server_default='0')  # DIFFICULTY_RANKS[difficulty]
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
+
+    # Widget protocol: a user's open missions by date, then priority
+    __table_args__ = (db.Index('ix_habit_protocol', 'goal_id', 'completed', 'target_date', 'priority'),)
+
+@db.event.listens_for(Habit, 'before_update')
+def _sync_habit_priority(mapper, connection, habit):
+    habit.priority = DIFFICULTY_RANKS.get(habit.difficulty, 0)
 
 # --- 4. USER CLASS ---
 class User(UserMixin, db.Model):
@@ -81,20 +103,91 @@ class User(UserMixin, db.Model):
     cha_score = db.Column(db.Integer, default=0)
     con_score = db.Column(db.Integer, default=0)
 
+    # Running XP for one month ('YYYY-MM'), kept in step with QuestHistory by add_progress
+    monthly_xp = db.Column(db.Integer, default=0)
+    monthly_xp_month = db.Column(db.String(7), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)  # page ETags (conditional.py)
+
     # Relationships
     goals = db.relationship('Goal', backref='author', lazy=True, cascade="all, delete-orphan")
     tasks = db.relationship('Task', backref='author', lazy=True, cascade="all, delete-orphan")
     notifications = db.relationship('Notification', backref='user', lazy=True, cascade="all, delete-orphan")
+    api_tokens = db.relationship('ApiToken', backref='user', lazy=True, cascade="all, delete-orphan")
+    api_operations = db.relationship('ApiOperation', lazy=True, cascade="all, delete-orphan")
+
+    # jobs purge-guests: expired guest accounts by last activity
+    __table_args__ = (db.Index('ix_user_guest_updated', 'is_guest', 'updated_at'),)
+
+    @property
+    def current_monthly_xp(self):
+        """This month's XP from the counter (a stale month means nothing earned yet)."""
+        return (self.monthly_xp or 0) if self.monthly_xp_month == month_key() else 0
+
+# Habit.stat_type -> the User score column it feeds
+STAT_COLUMNS = {
+    'STR': User.str_score,
+    'INT': User.int_score,
+    'WIS': User.wis_score,
+    'CHA': User.cha_score,
+    'CON': User.con_score,
+}
+
+def month_key(day=None):
+    return (day or date.today()).strftime('%Y-%m')
+
+def add_progress(user_id, xp=0, stat_type=None, gold=0, focus_time=0, monthly_xp=0):
+    """
+    Atomically add (or with negative values, take back) XP/stat/gold/focus
+    for a user in a single UPDATE ... SET col = col + :delta, so concurrent
+    requests can't overwrite each other. Returns the new total_xp.
+    Does not commit.
+
+    monthly_xp is the part that lands in (or leaves) this month's QuestHistory;
+    the counter restarts from it when the stored month is not the current one.
+    """
+    deltas = {User.total_xp: xp, User.gold: gold, User.total_focus_time: focus_time}
+    stat_col = STAT_COLUMNS.get(stat_type)
+    if stat_col is not None:
+        deltas[stat_col] = xp
+
+    values = {col: func.coalesce(col, 0) + d for col, d in deltas.items() if d}
+    if monthly_xp:
+        key = month_key()
+        values[User.monthly_xp] = case(
+            (User.monthly_xp_month == key, func.coalesce(User.monthly_xp, 0) + monthly_xp),
+            else_=monthly_xp
+        )
+        values[User.monthly_xp_month] = key
+        deltas[User.monthly_xp] = deltas[User.monthly_xp_month] = monthly_xp
+    if not values:
+        return db.session.scalar(db.select(User.total_xp).where(User.id == user_id))
+
+    stmt = (
+        update(User).where(User.id == user_id).values(values)
+        .returning(User.total_xp)
+        .execution_options(synchronize_session=False)
+    )
+    new_total = db.session.execute(stmt).scalar()
+
+    # Drop the stale in-memory copy so later reads in this request see the DB values
+    user = db.session.identity_map.get(identity_key(User, user_id))
+    if user is not None:
+        db.session.expire(user, [c.key for c in deltas])
+    return new_total
 
 # --- 5. OTHER MODELS ---
 class QuestHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    habit_id = db.Column(db.Integer, db.ForeignKey('habit.id', ondelete='SET NULL'), nullable=True, index=True)  # NULL for legacy rows / deleted habits
     name = db.Column(db.String(150))
     difficulty = db.Column(db.String(20))
     stat_type = db.Column(db.String(10))
     xp_gained = db.Column(db.Integer)
     date_completed = db.Column(db.Date, default=date.today)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (db.Index('ix_quest_history_user_updated', 'user_id', 'updated_at'),)
 
 class Feedback(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -112,10 +205,44 @@ class Notification(db.Model):
     type = db.Column(db.String(20), default='info') # info, warning, success
     is_read = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (db.Index('ix_notification_user_updated', 'user_id', 'updated_at'),)
 
 class DailyLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     date = db.Column(db.Date, default=date.today)
     mood = db.Column(db.String(50), nullable=True)
-    notes = db.Column(db.Text, nullable=True)
\ No newline at end of file
+    notes = db.Column(db.Text, nullable=True)
+
+class ApiToken(db.Model):
+    """Per-device widget token. Only the SHA-256 of the token is stored."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    name = db.Column(db.String(80), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, nullable=True)
+
+class ApiOperation(db.Model):
+    """Outcome of one client operation id, so widget retries are replayed, not re-applied."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    op_id = db.Column(db.String(64), nullable=False)
+    habit_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), nullable=False)
+    xp = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'op_id', name='uq_api_operation_user_op'),)
+
+class Tombstone(db.Model):
+    """A deleted row, kept so /api/sync clients can drop it. row_id NULL = the whole table was wiped."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    table = db.Column(db.String(20), nullable=False)
+    row_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (db.Index('ix_tombstone_user_deleted', 'user_id', 'deleted_at'),)
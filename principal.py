@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import abort, current_app
+from flask_login import UserMixin, logout_user
+from sqlalchemy import event, select
+
+from database import RoutingSession
+from extensions import db, login_manager
+from models import User
+
+# ---------------------------------------------------------
+# SLIM PRINCIPAL (current_user)
+# load_user hands Flask-Login a small projection of the user instead of the
+# full ~35-column row. The projection is kept in a short-TTL in-process LRU
+# and dropped whenever a User row is flushed. Reading or writing any other
+# attribute loads the real User once for that request, so route code keeps
+# working unchanged. Principal fields must be changed through the ORM (not a
+# bulk UPDATE) for the cache to notice; other processes see changes after
+# PRINCIPAL_CACHE_TTL. A user deleted by another process is logged out the
+# first time the request reaches for the full row.
+# ---------------------------------------------------------
+PRINCIPAL_FIELDS = ('id', 'username', 'theme', 'is_guest', 'is_pro', 'is_admin', 'is_banned', 'in_penalty_zone')
+
+_principal_cache = OrderedDict()   # user_id -> (expires_at, fields)
+_principal_lock = threading.Lock()
+
+
+class Principal(UserMixin):
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+        self.__dict__['_record'] = None
+
+    @property
+    def record(self):
+        """The full User row (loaded on first use, then reused for the request)."""
+        if self._record is None:
+            record = db.session.get(User, self.id)
+            if record is None:
+                # Deleted elsewhere while this principal sat in the cache
+                invalidate_principal(self.id)
+                logout_user()
+                abort(login_manager.unauthorized())
+            self.__dict__['_record'] = record
+        return self._record
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.record, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.record, name, value)
+        if name in self.__dict__:
+            self.__dict__[name] = value
+
+    def __repr__(self):
+        return f"<Principal {self.id}>"
+
+
+def load_principal(user_id):
+    now = time.monotonic()
+    with _principal_lock:
+        hit = _principal_cache.get(user_id)
+        if hit and hit[0] > now:
+            _principal_cache.move_to_end(user_id)
+            return Principal(hit[1])
+
+    row = db.session.execute(
+        select(*(getattr(User, f) for f in PRINCIPAL_FIELDS)).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+
+    fields = row._asdict()
+    config = current_app.config
+    with _principal_lock:
+        _principal_cache[user_id] = (now + config['PRINCIPAL_CACHE_TTL'], fields)
+        _principal_cache.move_to_end(user_id)
+        while len(_principal_cache) > config['PRINCIPAL_CACHE_SIZE']:
+            _principal_cache.popitem(last=False)
+    return Principal(fields)
+
+
+def invalidate_principal(user_id):
+    with _principal_lock:
+        _principal_cache.pop(user_id, None)
+
+
+# Drop cached principals for any User row written through the ORM. Done at
+# flush and again at commit so a concurrent request can't re-cache the old row
+# in between.
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_user_writes(session, flush_context):
+    touched = session.info.setdefault('principal_dirty', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            touched.add(obj.id)
+            invalidate_principal(obj.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_on_commit(session):
+    for user_id in session.info.pop('principal_dirty', ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop('principal_dirty', None)
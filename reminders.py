@@ -0,0 +1,184 @@
+import json
+import queue
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Goal, Habit
+
+# ---------------------------------------------------------
+# REMINDER DELIVERY
+# Browsers hold one SSE stream (/reminders/stream) instead of polling.
+# A single scheduler thread per process scans only the users that currently
+# have a stream open, works out due-soon/overdue habits, and publishes new
+# ones to every open tab of that user through an in-process pub/sub.
+# An idle stream is one parked thread + one small queue; it holds no DB
+# connection or app context. That needs a threaded/async server (gunicorn
+# gthread/gevent): with the default sync worker a few tabs would occupy every
+# worker, so push is off unless REMINDER_PUSH is set, and browsers then poll
+# /get_reminders, which answers immediately via hub.check(). Each process keeps its own "already
+# reminded" set, so with several workers a tab may get one duplicate; the
+# client collapses those via the notification tag.
+# ---------------------------------------------------------
+REMINDER_QUEUE_SIZE = 8
+
+
+class ReminderHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}      # user_id -> set of queues (one per open tab)
+        self._seen = {}             # user_id -> (day, {(habit_id, kind)}) already sent
+        self._pending = set()       # users to scan right away (just connected)
+        self._wake = threading.Event()
+        self._scheduler = None
+
+    # --- pub/sub ---
+    def subscribe(self, user_id):
+        q = queue.Queue(maxsize=REMINDER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(q)
+            self._pending.add(user_id)
+        self._wake.set()
+        return q
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            subs = self._subscribers.get(user_id)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, payload):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        for q in targets:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                pass  # tab isn't reading; it already has plenty queued
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._subscribers),
+                'streams': sum(len(s) for s in self._subscribers.values()),
+            }
+
+    # --- scheduler ---
+    def start(self, flask_app):
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            self._scheduler = threading.Thread(
+                target=self._run, args=(flask_app,), name='reminder-scheduler', daemon=True
+            )
+        self._scheduler.start()
+
+    def _run(self, flask_app):
+        interval = flask_app.config.get('REMINDER_SCAN_SECONDS', 60)
+        next_full = 0
+        while True:
+            self._wake.wait(timeout=max(0.0, next_full - time.monotonic()))
+            self._wake.clear()
+            with self._lock:
+                if time.monotonic() >= next_full:
+                    user_ids = set(self._subscribers)
+                    next_full = time.monotonic() + interval
+                else:
+                    user_ids = self._pending & set(self._subscribers)
+                self._pending.clear()
+            if not user_ids:
+                continue
+            try:
+                with flask_app.app_context():
+                    self.scan(user_ids)
+            except Exception as e:
+                print(f"[Reminders] Scan failed: {e}")
+
+    def scan(self, user_ids, today=None):
+        """One query for all given users; publish anything not yet sent today."""
+        today = today or date.today()
+        for user_id, items in _due_habits(user_ids, today).items():
+            fresh = self._unseen(user_id, items, today)
+            if fresh:
+                self.publish(user_id, _reminder_payload(fresh))
+
+        with self._lock:
+            # Forget yesterday's bookkeeping for users who have gone away
+            for user_id in [u for u, (day, _) in self._seen.items() if day != today and u not in self._subscribers]:
+                del self._seen[user_id]
+
+    def check(self, user_id, today=None):
+        """Plain polling (push disabled): the payload for anything not yet sent today, or None."""
+        today = today or date.today()
+        fresh = self._unseen(user_id, _due_habits([user_id], today).get(user_id, []), today)
+        return _reminder_payload(fresh) if fresh else None
+
+    def _unseen(self, user_id, items, today):
+        with self._lock:
+            day, seen = self._seen.get(user_id, (today, set()))
+            if day != today:
+                seen = set()
+            fresh = [i for i in items if (i[0], i[1]) not in seen]
+            seen.update((i[0], i[1]) for i in fresh)
+            self._seen[user_id] = (today, seen)
+        return fresh
+
+
+def _due_habits(user_ids, today):
+    """{user_id: [(habit_id, 'overdue'|'due_soon', name)]} in one query."""
+    rows = db.session.execute(
+        select(Goal.user_id, Habit.id, Habit.name, Habit.target_date)
+        .join(Goal, Habit.goal_id == Goal.id)
+        .where(
+            Goal.user_id.in_(list(user_ids)),
+            Habit.completed.is_not(True),
+            Habit.target_date.is_not(None),
+            Habit.target_date <= today + timedelta(days=1),
+        )
+    ).all()
+
+    due = {}
+    for user_id, habit_id, name, target in rows:
+        kind = 'overdue' if target < today else 'due_soon'
+        due.setdefault(user_id, []).append((habit_id, kind, name))
+    return due
+
+
+def _reminder_payload(items):
+    overdue = [name for _, kind, name in items if kind == 'overdue']
+    soon = [name for _, kind, name in items if kind == 'due_soon']
+    parts = []
+    if overdue:
+        parts.append(f"{len(overdue)} overdue: " + ", ".join(overdue[:3]))
+    if soon:
+        parts.append(f"{len(soon)} due soon: " + ", ".join(soon[:3]))
+    return {
+        "alert": True,
+        "message": " | ".join(parts),
+        "overdue": len(overdue),
+        "due_soon": len(soon),
+        "tag": "reminder-" + "-".join(str(habit_id) for habit_id, _, _ in sorted(items)[:8]),
+    }
+
+
+hub = ReminderHub()
+
+
+def sse_stream(user_id, q, heartbeat, retry_ms):
+    """SSE body for one tab. Runs after the request context is gone."""
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while True:
+            try:
+                payload = q.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": ping\n\n"  # keeps proxies from closing the idle stream
+                continue
+            yield f"event: reminder\ndata: {json.dumps(payload)}\n\n"
+    finally:
+        hub.unsubscribe(user_id, q)
@@ -1,7 +1,8 @@
-from app import app, db
+from app import create_app, db
 from models import User
 
-# This starts the connection to the database
+# This starts the connection to the database (no routes needed)
+app = create_app(minimal=True)
 with app.app_context():
     # REPLACE 'CosmoCommander' WITH YOUR EXACT USERNAME
     user = User.query.filter_by(username='ArishDev').first()
@@ -13,10 +14,11 @@ with app.app_context():
     else:
         print("User not found! Did you register on the website first?")
 
-from app import app, db
+from app import create_app, db
 from models import User
 
-# This starts the connection to the database
+# This starts the connection to the database (no routes needed)
+app = create_app(minimal=True)
 with app.app_context():
     # REPLACE 'CosmoCommander' WITH YOUR EXACT USERNAME
     user = User.query.filter_by(username='Arish').first()
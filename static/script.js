@@ -6,7 +6,8 @@ document.addEventListener('DOMContentLoaded', () => {
         Notification.requestPermission();
     }
 
-    setInterval(checkReminders, 60000);
+    initReminders();
+    initServiceWorker();
     checkAdLock();
 
     if (localStorage.getItem('zenMode') === 'true') {
@@ -151,16 +152,101 @@ function requestNotificationPermission() {
     });
 }
 
-function checkReminders() {
+// Reminders are pushed over one SSE stream per browser (long-poll where
+// EventSource is missing) when the server enables push (<body
+// data-reminder-push="on">); otherwise the owning tab polls once a minute. Tabs coordinate over a BroadcastChannel: the tab
+// that most recently became visible owns the stream and the others close
+// theirs, so background tabs still get alerts without N open connections.
+// Failed connections back off exponentially (15s -> 5min, with jitter).
+const REMINDER_BACKOFF_MIN = 15000;
+const REMINDER_BACKOFF_MAX = 300000;
+const REMINDER_POLL_MS = 60000;
+const reminders = { source: null, polling: false, timer: null, backoff: REMINDER_BACKOFF_MIN, channel: null, push: false };
+
+function initReminders() {
     if (!('Notification' in window) || Notification.permission !== 'granted') return;
-    fetch('/get_reminders')
+    reminders.push = document.body.dataset.reminderPush === 'on';
+
+    if ('BroadcastChannel' in window) {
+        reminders.channel = new BroadcastChannel('liferpg-reminders');
+        reminders.channel.onmessage = (event) => {
+            if (event.data === 'claim') stopReminders();
+        };
+    }
+
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) claimReminders();
+    });
+    window.addEventListener('pagehide', stopReminders);
+
+    if (!document.hidden) claimReminders();
+}
+
+function claimReminders() {
+    if (reminders.channel) reminders.channel.postMessage('claim');
+    startReminders();
+}
+
+function startReminders() {
+    if (reminders.source || reminders.polling) return;
+    clearTimeout(reminders.timer);
+
+    if (!reminders.push || !('EventSource' in window)) {
+        reminders.polling = true;
+        pollReminders();
+        return;
+    }
+
+    const source = new EventSource('/reminders/stream');
+    reminders.source = source;
+    source.onopen = () => { reminders.backoff = REMINDER_BACKOFF_MIN; };
+    source.addEventListener('reminder', (event) => showReminder(JSON.parse(event.data)));
+    source.onerror = () => {
+        // Take over from the browser's fixed-interval retry so we can back off
+        stopReminders();
+        scheduleReminderRetry();
+    };
+}
+
+function stopReminders() {
+    clearTimeout(reminders.timer);
+    reminders.polling = false;
+    if (reminders.source) {
+        reminders.source.close();
+        reminders.source = null;
+    }
+}
+
+function scheduleReminderRetry() {
+    const delay = reminders.backoff * (0.75 + Math.random() * 0.5);
+    reminders.backoff = Math.min(reminders.backoff * 2, REMINDER_BACKOFF_MAX);
+    reminders.timer = setTimeout(startReminders, delay);
+}
+
+function pollReminders() {
+    if (!reminders.polling) return;
+    fetch(reminders.push ? '/get_reminders?wait=25' : '/get_reminders')
         .then(response => response.json())
         .then(data => {
-            if (data.alert) {
-                new Notification('Mission Alert', { body: data.message });
-            }
+            reminders.backoff = REMINDER_BACKOFF_MIN;
+            if (data.alert) showReminder(data);
+            if (reminders.push) pollReminders();
+            else reminders.timer = setTimeout(pollReminders, REMINDER_POLL_MS);
         })
-        .catch(err => console.log('Reminder check failed', err));
+        .catch(err => {
+            console.log('Reminder check failed', err);
+            reminders.polling = false;
+            scheduleReminderRetry();
+        });
+}
+
+function showReminder(data) {
+    new Notification('Mission Alert', { body: data.message, tag: data.tag });
+}
+
+function initServiceWorker() {
+    if (!('serviceWorker' in navigator)) return;
+    navigator.serviceWorker.register('/sw.js').catch(err => console.log('Service worker registration failed', err));
 }
 
 function checkAdLock() {
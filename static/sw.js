@@ -0,0 +1,94 @@
+// LifeRPG service worker: keeps the static shell available offline.
+//  - /static/*    stale-while-revalidate (instant from cache, refreshed in background)
+//  - page loads   network-first; only OFFLINE_PAGES are kept for offline use,
+//                 and never a response marked Cache-Control: no-store/private
+//                 (/settings shows freshly minted API tokens, /admin other
+//                 people's data). Offline, any page falls back to /dashboard.
+//  - everything else (API, SSE, POSTs) goes straight to the network
+// Data for offline use comes from /api/sync, not from cached HTML.
+// Bump SHELL_VERSION whenever the SHELL list changes. After `flask assets build`
+// /sw.js is served with the SHELL paths swapped for their fingerprinted
+// /static/dist/ names and the build id appended to SHELL_VERSION; those files
+// never change under the same name, so they are served cache-first.
+const SHELL_VERSION = 'v1';
+const SHELL_CACHE = `liferpg-shell-${SHELL_VERSION}`;
+const PAGE_CACHE = 'liferpg-pages-v2';
+const OFFLINE_PAGES = ['/', '/dashboard', '/planning', '/focus_hub'];
+const SHELL = [
+    '/static/style.css',
+    '/static/modern.css',
+    '/static/script.js',
+    '/static/theme.js',
+    '/static/effects.js',
+    '/static/logo.png',
+    '/static/manifest.json',
+];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(caches.open(SHELL_CACHE).then(cache => cache.addAll(SHELL)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => (key.startsWith('liferpg-shell-') && key !== SHELL_CACHE)
+                    || (key.startsWith('liferpg-pages') && key !== PAGE_CACHE))
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+
+    if (url.pathname.startsWith('/static/dist/')) {
+        event.respondWith(cacheFirst(request));
+    } else if (url.pathname.startsWith('/static/')) {
+        event.respondWith(staleWhileRevalidate(request));
+    } else if (request.mode === 'navigate') {
+        if (url.pathname === '/logout') {
+            // Don't leave someone's pages behind on a shared device
+            caches.delete(PAGE_CACHE);
+            return;
+        }
+        event.respondWith(networkFirst(request));
+    }
+});
+
+function cacheFirst(request) {
+    return caches.open(SHELL_CACHE).then(cache => cache.match(request).then(cached => cached || fetch(request).then(response => {
+        if (response.ok) cache.put(request, response.clone());
+        return response;
+    })));
+}
+
+function staleWhileRevalidate(request) {
+    return caches.open(SHELL_CACHE).then(cache => cache.match(request).then(cached => {
+        const fresh = fetch(request).then(response => {
+            if (response.ok) cache.put(request, response.clone());
+            return response;
+        }).catch(() => cached);
+        return cached || fresh;
+    }));
+}
+
+function cacheablePage(request, response) {
+    if (!OFFLINE_PAGES.includes(new URL(request.url).pathname)) return false;
+    const cacheControl = response.headers.get('Cache-Control') || '';
+    return !/no-store|private/i.test(cacheControl);
+}
+
+function networkFirst(request) {
+    return fetch(request).then(response => {
+        if (response.ok && !response.redirected && cacheablePage(request, response)) {
+            const copy = response.clone();
+            caches.open(PAGE_CACHE).then(cache => cache.put(request, copy));
+        }
+        return response;
+    }).catch(() => caches.open(PAGE_CACHE).then(cache => cache.match(request)
+        .then(cached => cached || cache.match('/dashboard'))
+        .then(cached => cached || Response.error())));
+}
@@ -0,0 +1,129 @@
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User  # noqa: E402
+
+
+# ---------------------------------------------------------
+# SLOW TESTS
+# Benchmarks and full-size runs are marked @pytest.mark.slow and only run
+# with `pytest --run-slow`.
+# ---------------------------------------------------------
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', help='also run tests marked slow')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: benchmark or full-size run, needs --run-slow')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+    skip = pytest.mark.skip(reason='slow; run with --run-slow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
+
+
+# ---------------------------------------------------------
+# DATABASE MATRIX
+# Every test that uses `app` runs against SQLite and PostgreSQL. The
+# PostgreSQL case uses TEST_POSTGRES_URL if set, otherwise a throwaway
+# cluster started with initdb/pg_ctl for the session; it is skipped when
+# psycopg2 or those binaries are missing.
+# ---------------------------------------------------------
+def _pg_binary(name):
+    found = shutil.which(name)
+    if found:
+        return found
+    candidates = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    return candidates[-1] if candidates else None
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope='session')
+def postgres_url(tmp_path_factory):
+    pytest.importorskip('psycopg2')
+    url = os.getenv('TEST_POSTGRES_URL')
+    if url:
+        yield url
+        return
+
+    initdb, pg_ctl = _pg_binary('initdb'), _pg_binary('pg_ctl')
+    if not initdb or not pg_ctl:
+        pytest.skip("PostgreSQL binaries (initdb/pg_ctl) not found")
+    if hasattr(os, 'geteuid') and os.geteuid() == 0:
+        pytest.skip("initdb refuses to run as root; set TEST_POSTGRES_URL instead")
+
+    base = tmp_path_factory.mktemp('pg')
+    data = base / 'data'
+    port = _free_port()
+    subprocess.run([initdb, '-D', str(data), '-U', 'postgres', '--auth=trust', '-E', 'UTF8'],
+                   check=True, capture_output=True)
+    subprocess.run([pg_ctl, '-D', str(data), '-l', str(base / 'server.log'), '-w',
+                    '-o', f"-p {port} -k {base} -c listen_addresses=''", 'start'],
+                   check=True, capture_output=True)
+    try:
+        yield f"postgresql+psycopg2://postgres@/postgres?host={base}&port={port}"
+    finally:
+        subprocess.run([pg_ctl, '-D', str(data), '-m', 'immediate', 'stop'], capture_output=True)
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def database_url(request, tmp_path):
+    if request.param == 'sqlite':
+        # File-backed so threads get their own connections, as under gunicorn
+        return f"sqlite:///{tmp_path / 'test.db'}"
+    return request.getfixturevalue('postgres_url')
+
+
+@pytest.fixture
+def app(database_url):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'PRINCIPAL_CACHE_TTL': 0,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()  # the PostgreSQL database is shared by the whole session
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(username='tester', password='x')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def login(app):
+    def make_client(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+    return make_client
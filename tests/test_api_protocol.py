@@ -0,0 +1,31 @@
+"""/api/get_protocol must notice changes made by other workers, whose cache drops it never sees."""
+from sqlalchemy import update
+
+from extensions import db
+from models import Goal, Habit
+
+
+def test_protocol_cache_sees_changes_from_other_workers(app, user_id):
+    with app.app_context():
+        goal = Goal(name='Goal', user_id=user_id)
+        db.session.add(goal)
+        db.session.commit()
+        habit = Habit(name='Mission', goal_id=goal.id)
+        db.session.add(habit)
+        db.session.commit()
+        habit_id = habit.id
+
+    client = app.test_client()
+    url = '/api/get_protocol?username=tester'
+    first = client.get(url)
+    assert [m['id'] for m in first.json['missions']] == [habit_id]
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # Another worker completes the mission: straight to the database, no session events here
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(update(Habit.__table__).where(Habit.id == habit_id).values(completed=True))
+
+    again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 200
+    assert again.json['missions'] == []
@@ -0,0 +1,38 @@
+"""Deleting a habit, directly or with its goal, unlinks its history instead of leaving a dangling id."""
+from extensions import db
+from models import Goal, Habit, QuestHistory
+
+
+def _completed_habits(app, client, user_id, n):
+    with app.app_context():
+        goal = Goal(name='Goal', user_id=user_id)
+        db.session.add(goal)
+        db.session.commit()
+        habits = [Habit(name=f"Habit {i}", goal_id=goal.id, xp_value=10) for i in range(n)]
+        db.session.add_all(habits)
+        db.session.commit()
+        goal_id, habit_ids = goal.id, [h.id for h in habits]
+    for habit_id in habit_ids:
+        assert client.post(f"/toggle_habit/{habit_id}").status_code == 200
+    return goal_id, habit_ids
+
+
+def _links(app, user_id):
+    with app.app_context():
+        return sorted((h.name, h.habit_id) for h in QuestHistory.query.filter_by(user_id=user_id))
+
+
+def test_delete_habit_unlinks_history(app, user_id, login):
+    client = login(user_id)
+    _, (kept, deleted) = _completed_habits(app, client, user_id, 2)
+
+    client.get(f"/delete_habit/{deleted}")
+    assert _links(app, user_id) == [('Habit 0', kept), ('Habit 1', None)]
+
+
+def test_delete_goal_unlinks_history(app, user_id, login):
+    client = login(user_id)
+    goal_id, _ = _completed_habits(app, client, user_id, 2)
+
+    client.get(f"/delete_goal/{goal_id}")
+    assert _links(app, user_id) == [('Habit 0', None), ('Habit 1', None)]
@@ -0,0 +1,46 @@
+"""A free-tier import costs the same handful of statements for 10 lines or 1,000."""
+from sqlalchemy import event
+
+from extensions import db
+from models import User, Habit
+
+STATEMENT_BUDGET = 10   # was ~2 per line (goal lookup + insert) before batching
+
+
+def _lines(n):
+    kinds = ("study python chapter {}", "gym session {}", "call friend {}")
+    return "\n".join(kinds[i % 3].format(i) for i in range(n))
+
+
+def _import(app, login, username, n):
+    with app.app_context():
+        user = User(username=username, password='x', is_pro=False)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    client = login(user_id)
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.post('/import', data={'raw_text': _lines(n)})
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert Habit.query.join(Habit.goal).filter_by(user_id=user_id).count() == n
+    return len(statements)
+
+
+def test_import_statement_count_is_flat(app, login):
+    small = _import(app, login, 'small', 10)
+    big = _import(app, login, 'big', 1000)
+    assert big <= STATEMENT_BUDGET
+    assert big - small <= 1   # executemany may be paged by the driver, never per row
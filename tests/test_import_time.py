@@ -0,0 +1,28 @@
+"""Booting a worker must not pull in the Gemini SDK or WeasyPrint (see utils._get_genai)."""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('google.generativeai', 'weasyprint')
+# Best of 3 cold `import app` runs, seconds; ~0.6 now, ~1.3 with the eager imports
+BUDGET = float(os.getenv('IMPORT_TIME_BUDGET', 1.0))
+
+PROBE = f"""
+import json, sys, time
+t = time.perf_counter()
+import app
+print(json.dumps({{'seconds': time.perf_counter() - t, 'loaded': [m for m in {HEAVY!r} if m in sys.modules]}}))
+"""
+
+
+def _probe():
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_import_app_is_light():
+    runs = [_probe() for _ in range(3)]
+    assert runs[0]['loaded'] == []
+    assert min(r['seconds'] for r in runs) < BUDGET
@@ -0,0 +1,68 @@
+"""Parallel toggles, widget completions and focus sessions must not lose or double-apply XP."""
+from concurrent.futures import ThreadPoolExecutor
+
+from extensions import db
+from models import User, Goal, Habit, QuestHistory
+
+THREADS = 16
+
+
+def _habits(app, user_id):
+    with app.app_context():
+        goal = Goal(name='Goal', user_id=user_id)
+        db.session.add(goal)
+        db.session.commit()
+        daily = Habit(name='Daily', goal_id=goal.id, xp_value=10, stat_type='STR')
+        mission = Habit(name='Mission', goal_id=goal.id, xp_value=30)
+        db.session.add_all([daily, mission])
+        db.session.commit()
+        return daily.id, mission.id
+
+
+def _run(clients, fn, n):
+    with ThreadPoolExecutor(THREADS) as pool:
+        return list(pool.map(lambda i: fn(clients[i % THREADS]), range(n)))
+
+
+def test_parallel_toggles_flip_and_pay_once(app, user_id, login):
+    daily_id, _ = _habits(app, user_id)
+    clients = [login(user_id) for _ in range(THREADS)]
+
+    codes = _run(clients, lambda c: c.post(f"/toggle_habit/{daily_id}").status_code, 1000)
+    assert set(codes) == {200}
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        completed = db.session.get(Habit, daily_id).completed
+        history = QuestHistory.query.filter_by(user_id=user_id, habit_id=daily_id).count()
+        # Whatever state the last flip left, XP, stat and history agree with it
+        assert user.total_xp == (10 if completed else 0)
+        assert user.str_score == (10 if completed else 0)
+        assert history == (1 if completed else 0)
+
+
+def test_parallel_widget_completions_claim_once(app, user_id, login):
+    _, mission_id = _habits(app, user_id)
+    clients = [app.test_client() for _ in range(THREADS)]
+
+    wins = _run(clients, lambda c: c.post(f"/api/complete_mission/{mission_id}?username=tester").json['success'], 200)
+    assert wins.count(True) == 1
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert user.total_xp == 30
+        assert user.gold == 3
+        assert QuestHistory.query.filter_by(user_id=user_id, habit_id=mission_id).count() == 1
+
+
+def test_parallel_focus_sessions_add_up(app, user_id, login):
+    clients = [login(user_id) for _ in range(THREADS)]
+
+    codes = _run(clients, lambda c: c.post('/save_focus_session', json={'minutes': 10}).status_code, 300)
+    assert set(codes) == {200}
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert user.total_xp == 300 * 20
+        assert user.gold == 300
+        assert user.total_focus_time == 3000
@@ -0,0 +1,55 @@
+"""@replica_read views read from the primary once the request (or a recent one) has written."""
+import shutil
+
+import pytest
+from sqlalchemy import select, update
+
+from app import create_app
+from database import replica_read
+from extensions import db
+from models import User
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{primary}",
+        'DATABASE_REPLICA_URL': f"sqlite:///{replica}",
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='tester', password='x', gold=0))
+        db.session.commit()
+        db.engine.dispose()
+    shutil.copy(primary, replica)  # a replica that never catches up
+
+    @app.route('/_gold')
+    @replica_read
+    def read_gold():
+        return str(db.session.scalar(select(User.gold)))
+
+    @app.route('/_write_then_read')
+    @replica_read
+    def write_then_read():
+        db.session.execute(update(User).values(gold=User.gold + 5))
+        db.session.commit()
+        return read_gold()
+
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_reads_after_a_write_in_the_same_request_use_the_primary(replica_app):
+    assert replica_app.test_client().get('/_write_then_read').text == '5'
+
+
+def test_plain_reads_use_the_replica(replica_app):
+    with replica_app.app_context():
+        with db.engine.begin() as conn:  # someone else's write, not yet replicated
+            conn.execute(update(User.__table__).values(gold=9))
+    assert replica_app.test_client().get('/_gold').text == '0'
@@ -3,9 +3,17 @@ import json
 import random
 import time
 import re
-import google.generativeai as genai
+import threading
+from collections import OrderedDict
 from datetime import date, timedelta
 
+from flask import current_app
+
+try:
+    import orjson  # Optional accelerated JSON decoder
+except ImportError:
+    orjson = None
+
 # ---------------------------------------------------------
 # GLOBAL SETTINGS & COOLDOWNS
 # ---------------------------------------------------------
@@ -24,6 +32,14 @@ MODEL_LIST = [
 ALLOWED_STAT_TYPES = {"STR", "INT", "WIS", "CON", "CHA"}
 DEFAULT_MODEL = MODEL_LIST[0]
 
+_genai = None  # Loaded lazily by _get_genai()
+
+# Compiled once at import instead of per response / per task
+_FENCE_OPEN_RE  = re.compile(r"^```(?:json)?\s*", re.IGNORECASE)
+_FENCE_CLOSE_RE = re.compile(r"\s*```$")
+_ISO_DATE_RE    = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_JSON_BOUNDS    = {"array": ("[", "]", list), "object": ("{", "}", dict)}
+
 # ---------------------------------------------------------
 # PRE-WRITTEN STATIC TEXT (Used during Cooldown / API failure)
 # ---------------------------------------------------------
@@ -58,6 +74,25 @@ def _configure_network_proxy():
         os.environ["https_proxy"] = "http://proxy.server:3128"
 
 
+def _get_genai():
+    """
+    Import google.generativeai on first use. It drags in gRPC/protobuf, which
+    every worker and CLI script would otherwise pay for at boot.
+    """
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        _genai = genai
+    return _genai
+
+
+def _json_loads(text):
+    """json.loads, routed through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
 def _extract_json_payload(raw_text, expected="array"):
     """
     Robustly extract JSON from model output that may include markdown/code fences.
@@ -69,16 +104,13 @@ def _extract_json_payload(raw_text, expected="array"):
     clean = raw_text.strip()
 
     # Strip ```json ... ``` or ``` ... ``` fences
-    clean = re.sub(r"^```(?:json)?\s*", "", clean, flags=re.IGNORECASE)
-    clean = re.sub(r"\s*```$", "", clean)
+    clean = _FENCE_OPEN_RE.sub("", clean)
+    clean = _FENCE_CLOSE_RE.sub("", clean)
     clean = clean.strip()
 
-    if expected == "array":
-        start = clean.find("[")
-        end   = clean.rfind("]")
-    else:
-        start = clean.find("{")
-        end   = clean.rfind("}")
+    open_char, close_char, _ = _JSON_BOUNDS.get(expected, _JSON_BOUNDS["object"])
+    start = clean.find(open_char)
+    end   = clean.rfind(close_char)
 
     if start == -1 or end == -1 or end <= start:
         raise ValueError(f"No valid JSON {expected} found in model response")
@@ -86,6 +118,26 @@ def _extract_json_payload(raw_text, expected="array"):
     return clean[start:end + 1]
 
 
+def _parse_json_payload(raw_text, expected="array"):
+    """
+    Fast path: most model replies are already bare JSON, so decode them directly.
+    Only fall back to fence stripping + bracket slicing when that fails or
+    the decoded value is not the expected container type.
+    """
+    if not raw_text:
+        raise ValueError("Empty model response")
+
+    expected_type = _JSON_BOUNDS.get(expected, _JSON_BOUNDS["object"])[2]
+    try:
+        parsed = _json_loads(raw_text)
+        if isinstance(parsed, expected_type):
+            return parsed
+    except ValueError:
+        pass
+
+    return _json_loads(_extract_json_payload(raw_text, expected=expected))
+
+
 def _safe_int(value, default=1, minimum=1, maximum=4):
     try:
         parsed = int(value)
@@ -118,7 +170,7 @@ def _normalize_task(task):
     # Validate target_date format
     if target_date is not None:
         target_date = str(target_date).strip() or None
-        if target_date and not re.match(r"^\d{4}-\d{2}-\d{2}$", target_date):
+        if target_date and not _ISO_DATE_RE.match(target_date):
             target_date = None
 
     # Must have a real name
@@ -150,14 +202,14 @@ def _call_model_with_fallback(prompt, available_keys, expected_json="array"):
         if not current_key:
             continue
         try:
+            genai = _get_genai()
             genai.configure(api_key=current_key)
             for model_name in MODEL_LIST:
                 try:
                     model    = genai.GenerativeModel(model_name)
                     response = model.generate_content(prompt)
                     raw_text = getattr(response, "text", "") or ""
-                    payload  = _extract_json_payload(raw_text, expected=expected_json)
-                    return json.loads(payload)
+                    return _parse_json_payload(raw_text, expected=expected_json)
                 except Exception:
                     continue
         except Exception:
@@ -528,6 +580,7 @@ def get_backlog_strategy(hours_debt, days_to_clear, mode):
             return random.choice(BACKLOG_FALLBACKS)
 
         _configure_network_proxy()
+        genai = _get_genai()
         genai.configure(api_key=api_key)
 
         prompt = (
@@ -565,6 +618,7 @@ def get_ai_feedback(stats_text):
             return random.choice(FEEDBACK_FALLBACKS)
 
         _configure_network_proxy()
+        genai = _get_genai()
         genai.configure(api_key=api_key)
 
         prompt = (
@@ -588,15 +642,111 @@ def get_ai_feedback(stats_text):
 
 # ---------------------------------------------------------
 # 5. GENIE QUESTION GENERATOR (unchanged logic, cleaner prompt)
+#    Near-duplicate wishes ("get fit", "Getting fitter!") share one
+#    cached question set, so only cache misses reach the model.
 # ---------------------------------------------------------
 
+GENIE_FALLBACK_QUESTIONS = [
+    "How much time can you realistically dedicate to this goal each week?",
+    "What is the biggest obstacle currently standing in your way?",
+    "What specific resources, tools, or budget do you currently have available?"
+]
+
+_WISH_STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "myself", "we", "our", "to", "for", "of",
+    "in", "on", "at", "and", "or", "but", "with", "by", "from", "into", "up",
+    "want", "wanna", "would", "like", "love", "need", "wish", "hope", "really",
+    "be", "become", "am", "is", "are", "will", "can", "could", "should", "must",
+    "please", "how", "do", "does", "finally", "just", "so", "very", "more", "this",
+    "that", "it", "some", "much", "better", "start", "try", "able"
+}
+
+# Tiny built-in lemma table for the words wishes actually use
+_WISH_LEMMAS = {
+    "getting": "get", "got": "get", "gets": "get",
+    "fitter": "fit", "fitness": "fit", "fittest": "fit",
+    "learning": "learn", "learned": "learn", "learnt": "learn", "learns": "learn",
+    "cracking": "crack", "cracked": "crack", "clear": "crack", "clearing": "crack", "pass": "crack", "passing": "crack",
+    "running": "run", "ran": "run", "runs": "run",
+    "coding": "code", "programming": "code", "program": "code",
+    "studying": "study", "studies": "study", "studied": "study",
+    "reading": "read", "reads": "read",
+    "writing": "write", "wrote": "write", "written": "write",
+    "losing": "lose", "lost": "lose", "loose": "lose",
+    "weights": "weight", "kgs": "kg", "kilos": "kg",
+    "exams": "exam", "examination": "exam", "tests": "exam", "test": "exam",
+    "languages": "language", "skills": "skill", "habits": "habit",
+    "healthier": "healthy", "health": "healthy",
+    "stronger": "strong", "strength": "strong",
+    "richer": "rich", "wealthy": "rich", "money": "rich",
+    "jobs": "job", "career": "job",
+    "py": "python", "python3": "python", "js": "javascript"
+}
+
+_WISH_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+_genie_question_cache = OrderedDict()
+_genie_question_lock  = threading.Lock()
+_genie_question_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _normalize_wish(wish):
+    """Reduce a wish to an order-insensitive key of its meaningful lemmas."""
+    tokens = _WISH_TOKEN_RE.findall(str(wish or "").lower())
+    lemmas = {_WISH_LEMMAS.get(t, t) for t in tokens if t not in _WISH_STOPWORDS}
+    return " ".join(sorted(lemmas))
+
+
+def _genie_cache_get(key):
+    with _genie_question_lock:
+        questions = _genie_question_cache.get(key)
+        if questions is None:
+            _genie_question_stats['misses'] += 1
+            return None
+        _genie_question_cache.move_to_end(key)
+        _genie_question_stats['hits'] += 1
+        return list(questions)
+
+
+def _genie_cache_put(key, questions):
+    with _genie_question_lock:
+        _genie_question_cache[key] = tuple(questions)
+        _genie_question_cache.move_to_end(key)
+        while len(_genie_question_cache) > current_app.config['GENIE_QUESTION_CACHE_SIZE']:
+            _genie_question_cache.popitem(last=False)
+            _genie_question_stats['evictions'] += 1
+
+
+def genie_question_cache_stats():
+    """Snapshot of the question cache for the admin panel."""
+    with _genie_question_lock:
+        hits   = _genie_question_stats['hits']
+        misses = _genie_question_stats['misses']
+        total  = hits + misses
+        return {
+            'hits':      hits,
+            'misses':    misses,
+            'evictions': _genie_question_stats['evictions'],
+            'size':      len(_genie_question_cache),
+            'capacity':  current_app.config['GENIE_QUESTION_CACHE_SIZE'],
+            'hit_ratio': round(hits / total, 3) if total else 0.0
+        }
+
+
 def generate_genie_questions(wish):
+    cache_key = _normalize_wish(wish)
+    if cache_key:
+        cached = _genie_cache_get(cache_key)
+        if cached:
+            return cached
+
     try:
         api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
         if not api_key:
             raise ValueError("Missing Gemini API key")
 
         _configure_network_proxy()
+        genai = _get_genai()
         genai.configure(api_key=api_key)
 
         model = genai.GenerativeModel(DEFAULT_MODEL)
@@ -612,21 +762,22 @@ Return ONLY a JSON array of exactly 3 question strings. No markdown. No extra te
 Example: ["How many hours per week can you realistically dedicate?", "What is your current level with this?", "What has stopped you before?"]"""
 
         response = model.generate_content(prompt)
-        payload   = _extract_json_payload(getattr(response, "text", ""), expected="array")
-        questions = json.loads(payload)
+        questions = _parse_json_payload(getattr(response, "text", ""), expected="array")
 
         if not isinstance(questions, list):
             raise ValueError("Not a list")
 
-        return [str(q).strip() for q in questions if str(q).strip()][:3]
+        questions = [str(q).strip() for q in questions if str(q).strip()][:3]
+
+        # Only real model answers are cached — fallbacks should retry next time
+        if cache_key and questions:
+            _genie_cache_put(cache_key, questions)
+
+        return questions
 
     except Exception as e:
         print(f"[GenieQuestions] Error: {e}")
-        return [
-            "How much time can you realistically dedicate to this goal each week?",
-            "What is the biggest obstacle currently standing in your way?",
-            "What specific resources, tools, or budget do you currently have available?"
-        ]
+        return list(GENIE_FALLBACK_QUESTIONS)
 
 
 # ---------------------------------------------------------
@@ -641,6 +792,7 @@ def generate_genie_blueprint(wish, q1, a1, q2, a2, q3, a3):
             raise ValueError("Missing Gemini API key")
 
         _configure_network_proxy()
+        genai = _get_genai()
         genai.configure(api_key=api_key)
 
         model = genai.GenerativeModel(DEFAULT_MODEL)
@@ -680,8 +832,7 @@ Return ONLY a JSON object with this EXACT structure. No markdown. No extra text.
 }}"""
 
         response  = model.generate_content(prompt)
-        payload   = _extract_json_payload(getattr(response, "text", ""), expected="object")
-        blueprint = json.loads(payload)
+        blueprint = _parse_json_payload(getattr(response, "text", ""), expected="object")
 
         if not isinstance(blueprint, dict):
             raise ValueError("Blueprint is not a dict")